@@ -0,0 +1,52 @@
+# Usage: python -m benchmarks [--output results.jsonl] [--files N] [--instances N] [--games N]
+# Runs every benchmark. Results are JSON lines, compare two runs with benchmarks.compare.
+
+import argparse
+
+from benchmarks import (
+    common,
+    discovery,
+    downloader,
+    installer_cache,
+    launch,
+    launchers,
+    multimc_time,
+    process_scanner,
+    registry,
+    sizes,
+    time_cache,
+    update,
+    watcher,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--files", type=int, default=20000, help="files in the launcher folder")
+    parser.add_argument("--instances", type=int, default=500, help="MultiMC instances")
+    parser.add_argument("--games", type=int, default=1000, help="games in the time cache")
+    args = parser.parse_args()
+
+    if args.output:
+        common.output = open(args.output, "w")
+    try:
+        sizes.main(args.files)
+        multimc_time.main(args.instances)
+        update.main(args.instances)
+        time_cache.main(args.games)
+        process_scanner.main()
+        launch.main()
+        watcher.main()
+        installer_cache.main()
+        downloader.main()
+        registry.main()
+        discovery.main(args.files)
+        launchers.main(args.instances)
+    finally:
+        if common.output is not None:
+            common.output.close()
+
+
+if __name__ == "__main__":
+    main()
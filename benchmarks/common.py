@@ -0,0 +1,39 @@
+import os, sys, json, time, asyncio, statistics
+from typing import Awaitable, Callable, Dict
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+# Where `report` writes results in addition to stdout, see benchmarks/__main__.py.
+output = None
+
+
+def measure(fn: Callable, *, repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """Runs `fn` `number` times per round and returns per-call timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def measure_async(
+    fn: Callable[[], Awaitable], *, repeat: int = 5, number: int = 1
+) -> Dict[str, float]:
+    """Like `measure` for coroutine functions, all run on one event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return measure(lambda: loop.run_until_complete(fn()), repeat=repeat, number=number)
+    finally:
+        loop.close()
+
+
+def report(benchmark: str, results: Dict):
+    """Prints one JSON line per benchmark so results can be collected and diffed."""
+    line = json.dumps({"benchmark": benchmark, **results}, sort_keys=True)
+    print(line)
+    if output is not None:
+        output.write(line + "\n")
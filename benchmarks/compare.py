@@ -0,0 +1,34 @@
+# Usage: python -m benchmarks.compare base.jsonl new.jsonl
+# Prints the relative change of every timing between two `python -m benchmarks --output` runs.
+
+import sys, json
+
+
+def _timings(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict) and "median" in value:
+            yield prefix + key, value["median"]
+        elif isinstance(value, dict):
+            yield from _timings(value, f"{prefix}{key}.")
+
+
+def load(path):
+    timings = {}
+    with open(path, "r") as f:
+        for line in f:
+            results = json.loads(line)
+            name = results.pop("benchmark")
+            for key, median in _timings(results):
+                timings[f"{name}.{key}"] = median
+    return timings
+
+
+def main(base_path, new_path):
+    base, new = load(base_path), load(new_path)
+    for name in sorted(base.keys() & new.keys()):
+        change = (new[name] - base[name]) / base[name] * 100 if base[name] else 0
+        print(f"{name:50} {base[name] * 1000:10.3f}ms {new[name] * 1000:10.3f}ms {change:+7.1f}%")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
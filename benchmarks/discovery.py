@@ -0,0 +1,73 @@
+# Usage: python -m benchmarks.discovery [files]
+# Times discovering MultiMC in a synthetic home folder with `files` files besides it: cold, from
+# the cache, and with no installation to find, where the search must stop at its time budget.
+# Uses the macOS layout (MultiMC.app) outside of Windows.
+
+import os, sys, time, asyncio, tempfile
+
+from benchmarks.common import report
+from benchmarks.fixtures import make_multimc, make_tree
+from consts import IS_WINDOWS, MULTIMC_DISCOVERY_TIMEOUT
+from utils import discovery
+import multimc
+
+
+def _make_home(root, files: int, *, with_multimc: bool):
+    make_tree(os.path.join(root, "Documents"), files // 2)
+    make_tree(os.path.join(root, "Projects"), files // 2, seed=1)
+    if with_multimc:
+        folder = os.path.join(root, "Downloads", "mmc-stable-win32", "MultiMC")
+        if IS_WINDOWS:
+            make_multimc(folder, 1)
+            with open(os.path.join(folder, "MultiMC.exe"), "wb"):
+                pass
+        else:
+            make_multimc(os.path.join(folder, "MultiMC.app"), 1)
+    return root
+
+
+def _discovery(root, files: int, *, with_multimc: bool):
+    home = _make_home(os.path.join(root, "home"), files, with_multimc=with_multimc)
+
+    def roots():
+        return [(os.path.join(home, "Downloads"), 3), (home, 8)]
+
+    return discovery.Discovery(
+        roots,
+        multimc.match_installation,
+        multimc.is_installation,
+        os.path.join(root, "discovery.json"),
+    )
+
+
+async def _timed(d):
+    start = time.perf_counter()
+    found = await d.discover(MULTIMC_DISCOVERY_TIMEOUT)
+    return {"seconds": time.perf_counter() - start, "found": len(found)}
+
+
+async def run(files: int):
+    with tempfile.TemporaryDirectory() as root:
+        d = _discovery(root, files, with_multimc=True)
+        cold = await _timed(d)
+        cached = await _timed(d)
+        d.close()
+    with tempfile.TemporaryDirectory() as root:
+        d = _discovery(root, files, with_multimc=False)
+        missing = await _timed(d)
+        d.close()
+    return {
+        "files": files,
+        "budget": MULTIMC_DISCOVERY_TIMEOUT,
+        "cold": cold,
+        "cached": cached,
+        "missing": missing,
+    }
+
+
+def main(files: int = 20000):
+    report("multimc.discovery", asyncio.run(run(files)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
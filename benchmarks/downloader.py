@@ -0,0 +1,43 @@
+# Usage: python -m benchmarks.downloader [megabytes]
+# Downloads a file from a local server throttling every connection, over a single stream and in
+# segments, and once more in segments with a connection dropped midway.
+
+import os, sys, time, asyncio, tempfile
+
+from benchmarks.common import report
+from benchmarks.fixtures import FileServer
+from utils import downloader
+
+RATE = 4 * 1024 * 1024  # bytes per second and connection
+
+
+async def _download(data, segments, **server_kwargs):
+    async with FileServer(data, rate=RATE, **server_kwargs) as server:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, server.name)
+            start = time.perf_counter()
+            await downloader.download(server.url, path, segments=segments)
+            seconds = time.perf_counter() - start
+            with open(path, "rb") as f:
+                assert f.read() == data
+    return {"seconds": seconds, "requests": server.requests, "bytes": server.bytes_sent}
+
+
+async def run(megabytes: int):
+    data = os.urandom(megabytes * 1024 * 1024)
+    return {
+        "megabytes": megabytes,
+        "single": await _download(data, 1),
+        "segmented": await _download(data, downloader.SEGMENTS),
+        "segmented_dropped": await _download(
+            data, downloader.SEGMENTS, drop_after=len(data) // downloader.SEGMENTS // 2
+        ),
+    }
+
+
+def main(megabytes: int = 16):
+    report("downloader.download", asyncio.run(run(megabytes)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,288 @@
+import os, re, random, asyncio, hashlib
+from unittest import mock
+
+from benchmarks.common import SRC  # noqa: F401 - puts src on sys.path
+from consts import IS_WINDOWS, GameID
+from local import InstallLocation, LocalClient
+import multimc
+import plugin
+
+INSTANCE_CFG = """InstanceType=OneSix
+JoinServerOnLaunch=false
+LogPrePostOutput=true
+MCLaunchMethod=LauncherPart
+OverrideCommands=false
+OverrideConsole=false
+OverrideJavaArgs=false
+OverrideJavaLocation=false
+OverrideMemory=false
+OverrideWindow=false
+iconKey=default
+lastLaunchTime={last_launch}
+name=Instance {index}
+notes=
+totalTimePlayed={time_played}
+"""
+
+
+def make_tree(root, files: int, *, fanout: int = 8, file_size: int = 512, seed: int = 0):
+    """Creates `files` files spread over nested directories with `fanout` entries each."""
+    rng = random.Random(seed)
+    for i in range(files):
+        parts = []
+        n = i // fanout
+        while n:
+            parts.append(f"d{n % fanout}")
+            n //= fanout
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{i}.dat"), "wb") as f:
+            f.write(b"\0" * rng.randint(0, file_size))
+
+
+def multimc_instances_path(folder):
+    if IS_WINDOWS:
+        return os.path.join(folder, "instances")
+    return os.path.join(folder, "Contents", "MacOS", "instances")
+
+
+def make_multimc(folder, instances: int, *, files_per_instance: int = 0, seed: int = 0):
+    """Creates a MultiMC folder usable as `MultiMCClient(folder)` outside of Windows."""
+    rng = random.Random(seed)
+    instances_path = multimc_instances_path(folder)
+    for i in range(instances):
+        instance = os.path.join(instances_path, f"instance{i}")
+        os.makedirs(instance)
+        with open(os.path.join(instance, "instance.cfg"), "w") as f:
+            f.write(
+                INSTANCE_CFG.format(
+                    index=i,
+                    last_launch=rng.randint(1_500_000_000_000, 1_700_000_000_000),
+                    time_played=rng.randint(0, 500_000),
+                )
+            )
+        if files_per_instance:
+            make_tree(os.path.join(instance, ".minecraft"), files_per_instance, seed=i)
+    return folder
+
+
+def make_time_cache(games: int, *, seed: int = 0):
+    rng = random.Random(seed)
+    return {
+        f"game{i}": {
+            "time_played": rng.uniform(0, 100000),
+            "last_played": rng.uniform(1.5e9, 1.7e9),
+        }
+        for i in range(games)
+    }
+
+
+class FakeLocalClient(LocalClient):
+    """Local client with every game installed in a subfolder of `root`."""
+
+    def __init__(self, root):
+        self.root = root
+        super().__init__()
+
+    def _resolve_install_location(self, game_id):
+        folder = os.path.join(self.root, game_id)
+        return InstallLocation(folder, os.path.join(folder, "launcher"), None)
+
+    def _install_signature(self, game_id, location):
+        try:
+            return os.stat(os.path.join(self.root, game_id)).st_mtime_ns
+        except OSError:
+            return None
+
+
+def make_plugin(installed_folder, *, local_root=None, multimc_folder=None):
+    """Returns a MinecraftPlugin owning both games, disconnected from Galaxy."""
+    with mock.patch.object(plugin, "INSTALLED_FOLDER_PATH", installed_folder):
+        instance = plugin.MinecraftPlugin(mock.MagicMock(), mock.MagicMock(), "token")
+        instance.handshake_complete()
+    instance.update_local_game_status = lambda local_game: None
+    instance.owned = [GameID.Minecraft, GameID.MinecraftDungeons]
+    if local_root is not None:
+        instance.local_client = FakeLocalClient(local_root)
+    if multimc_folder is not None:
+        instance.launchers = {"multimc": multimc.MultiMCClient(multimc_folder)}
+    return instance
+
+
+class FileServer:
+    """
+    Local HTTP server serving `data` at `url` with an ETag and Last-Modified, answering
+    conditional (304), Range (206) and If-Range requests. With a `rate` every response is
+    throttled to that many bytes per second, like a server limiting each connection. With
+    `drop_after` the first response to send that many bytes has its connection dropped. Counts
+    the requests and body bytes sent.
+    """
+
+    def __init__(
+        self, data: bytes, *, name: str = "installer.msi", rate: int = None, drop_after: int = None
+    ):
+        self.data = data
+        self.name = name
+        self.rate = rate
+        self.drop_after = drop_after
+        self.etag = '"%s"' % hashlib.sha256(data).hexdigest()[:16]
+        self.last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+        self.requests = 0
+        self.bytes_sent = 0
+        self.url = None
+        self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        self.requests += 1
+        headers = {
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "Accept-Ranges": "bytes",
+        }
+        if request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304, headers=headers)
+        start, end = 0, len(self.data)
+        status = 200
+        match = re.match(r"bytes=(\d+)-(\d*)", request.headers.get("Range", ""))
+        if_range = request.headers.get("If-Range")
+        if if_range is not None and if_range not in (self.etag, self.last_modified):
+            match = None  # changed since, the whole new file is sent
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) + 1, end) if match.group(2) else end
+            if start >= len(self.data):
+                return web.Response(status=416, headers=headers)
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(self.data)}"
+        headers["Content-Length"] = str(end - start)
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        chunk_size = 64 * 1024
+        try:
+            for offset in range(start, end, chunk_size):
+                if self.drop_after is not None and offset - start >= self.drop_after:
+                    self.drop_after = None
+                    request.transport.close()
+                    return response
+                chunk = self.data[offset : min(offset + chunk_size, end)]
+                await response.write(chunk)
+                self.bytes_sent += len(chunk)
+                if self.rate:
+                    await asyncio.sleep(len(chunk) / self.rate)
+            await response.write_eof()
+        except ConnectionError:
+            pass  # the client stopped reading, e.g. at the end of a segment
+        return response
+
+    async def __aenter__(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/" + self.name, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/{self.name}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+class FakeKey:
+    def __init__(self):
+        self.subkeys = {}
+        self.values = {}
+        self.last_write_time = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeWinreg:
+    """
+    In-memory stand-in for the `winreg` functions RegistryBackend uses, with hives of FakeKey.
+    `calls` counts the calls made to it.
+    """
+
+    HKEY_CURRENT_USER = 1
+    HKEY_LOCAL_MACHINE = 2
+
+    def __init__(self):
+        self.hives = {self.HKEY_CURRENT_USER: FakeKey(), self.HKEY_LOCAL_MACHINE: FakeKey()}
+        self.calls = 0
+        self._clock = 0
+
+    def create_key(self, hive, path, values=None) -> FakeKey:
+        self._clock += 1
+        key = self.hives[hive]
+        for name in filter(None, path.split("\\")):
+            if name not in key.subkeys:
+                key.subkeys[name] = FakeKey()
+                key.last_write_time = self._clock
+            key = key.subkeys[name]
+        key.values.update(values or {})
+        key.last_write_time = self._clock
+        return key
+
+    def ConnectRegistry(self, computer, hive):
+        self.calls += 1
+        return self.hives[hive]
+
+    def OpenKey(self, key, path):
+        self.calls += 1
+        for name in filter(None, path.split("\\")):
+            if name not in key.subkeys:
+                raise FileNotFoundError(path)
+            key = key.subkeys[name]
+        return key
+
+    def QueryValueEx(self, key, name):
+        self.calls += 1
+        if name not in key.values:
+            raise FileNotFoundError(name)
+        return key.values[name], 1
+
+    def QueryInfoKey(self, key):
+        self.calls += 1
+        return len(key.subkeys), len(key.values), key.last_write_time
+
+    def EnumKey(self, key, index):
+        self.calls += 1
+        return list(key.subkeys)[index]
+
+    def CloseKey(self, key):
+        pass
+
+
+def make_uninstall_hive(programs: int) -> FakeWinreg:
+    """A registry with `programs` Uninstall entries in each hive, Minecraft's among the last."""
+    from consts import SOFTWARE_PATHS, WIN_UNINSTALL_RELATIVE_LOCATION
+
+    fake = FakeWinreg()
+    for hive in fake.hives:
+        for software_path in SOFTWARE_PATHS:
+            path = software_path + WIN_UNINSTALL_RELATIVE_LOCATION
+            for i in range(programs):
+                fake.create_key(
+                    hive,
+                    f"{path}\\{{{i:08d}-0000-0000-0000-000000000000}}",
+                    {"DisplayName": f"Program {i}", "Publisher": "Vendor", "UninstallString": ""},
+                )
+    fake.create_key(
+        FakeWinreg.HKEY_LOCAL_MACHINE,
+        SOFTWARE_PATHS[1] + WIN_UNINSTALL_RELATIVE_LOCATION + "\\{MINECRAFT}",
+        {
+            "DisplayName": "Minecraft Launcher",
+            "Publisher": "Mojang",
+            "UninstallString": "MsiExec.exe /X{MINECRAFT}",
+        },
+    )
+    return fake
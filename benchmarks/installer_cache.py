@@ -0,0 +1,42 @@
+# Usage: python -m benchmarks.installer_cache [megabytes]
+# Times getting an installer from a local server through the installer cache, cold and when the
+# cached file is revalidated, and the bytes transferred for each.
+
+import os, sys, time, asyncio, tempfile
+
+from benchmarks.common import report
+from benchmarks.fixtures import FileServer
+from utils.installer_cache import InstallerCache
+
+
+async def _timed(server, fn):
+    sent = server.bytes_sent
+    start = time.perf_counter()
+    await fn()
+    return {"seconds": time.perf_counter() - start, "bytes": server.bytes_sent - sent}
+
+
+async def run(megabytes: int):
+    data = os.urandom(megabytes * 1024 * 1024)
+    async with FileServer(data) as server:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = InstallerCache(tmp, max_size=4 * len(data))
+            cold = await _timed(server, lambda: cache.get(server.url))
+            revalidated = await _timed(server, lambda: cache.get(server.url))
+            # A new instance, as after restarting Galaxy.
+            cache = InstallerCache(cache.path, max_size=cache.max_size)
+            restarted = await _timed(server, lambda: cache.get(server.url))
+    return {
+        "megabytes": megabytes,
+        "cold": cold,
+        "revalidated": revalidated,
+        "restarted": restarted,
+    }
+
+
+def main(megabytes: int = 20):
+    report("installer_cache.get", asyncio.run(run(megabytes)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
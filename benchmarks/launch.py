@@ -0,0 +1,82 @@
+# Usage: python -m benchmarks.launch
+# Times a single click on Play, from launch_game being called until the launcher is started, for
+# games with and without a double click effect, and checks that launching both games right after
+# another starts both.
+
+import os, time, asyncio, tempfile
+
+from benchmarks.common import report
+from benchmarks.fixtures import FakeLocalClient, make_multimc, make_plugin
+from consts import GameID
+
+
+class FinishedProcess:
+    returncode = 0
+
+    def poll(self):
+        return self.returncode
+
+    async def wait(self):
+        return self.returncode
+
+
+class LaunchRecorder(FakeLocalClient):
+    """Records when each game was launched instead of starting its launcher."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.launched = {}
+
+    async def launch(self, game_id):
+        self.launched[game_id] = time.perf_counter()
+        return FinishedProcess()
+
+
+def _make_plugin(root):
+    local_root = os.path.join(root, "local")
+    for game_id in [GameID.Minecraft, GameID.MinecraftDungeons]:
+        os.makedirs(os.path.join(local_root, game_id))
+    os.makedirs(os.path.join(root, "installed"))
+    instance = make_plugin(
+        os.path.join(root, "installed"),
+        multimc_folder=make_multimc(os.path.join(root, "multimc"), 1),
+    )
+    instance.local_client = LaunchRecorder(local_root)
+    return instance
+
+
+async def _click(instance, game_id, repeat=5):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await instance.launch_game(game_id)
+        latencies.append(instance.local_client.launched.pop(game_id) - start)
+    return {"min": min(latencies), "max": max(latencies)}
+
+
+async def run(root):
+    instance = _make_plugin(root)
+    single_click = {
+        "no_effect": await _click(instance, GameID.MinecraftDungeons),
+        "double_click_window": await _click(instance, GameID.Minecraft),
+    }
+    await asyncio.gather(
+        instance.launch_game(GameID.Minecraft), instance.launch_game(GameID.MinecraftDungeons)
+    )
+    report(
+        "plugin.launch",
+        {
+            "window": instance.double_click_window,
+            "single_click": single_click,
+            "both_games_launched": sorted(instance.local_client.launched),
+        },
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        asyncio.run(run(root))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Usage: python -m benchmarks.launchers [instances] [providers]
+# Times prepare_game_times_context with one and with `providers` MultiMC providers configured
+# (each with `instances` instances), cold and warm. Providers are queried concurrently on the
+# probe executor, which overlaps their disk I/O; parsing instance files holds the GIL, so on a
+# warm local disk the latency still grows with the total number of instances.
+
+import os, sys, tempfile
+
+from benchmarks.common import measure_async, report
+from benchmarks.fixtures import make_multimc, make_plugin
+from consts import GameID
+import multimc
+
+
+def _providers(folders):
+    return {f"multimc{i}": multimc.MultiMCClient(folder) for i, folder in enumerate(folders)}
+
+
+def _measure(root, instances: int, providers: int):
+    folders = [
+        make_multimc(os.path.join(root, f"multimc{i}"), instances, seed=i) for i in range(providers)
+    ]
+    os.makedirs(os.path.join(root, "installed"))
+    instance = make_plugin(os.path.join(root, "installed"))
+
+    async def cold():
+        # New providers, with empty caches.
+        instance.launchers = _providers(folders)
+        await instance.prepare_game_times_context([GameID.Minecraft])
+
+    async def warm():
+        await instance.prepare_game_times_context([GameID.Minecraft])
+
+    return {"cold": measure_async(cold), "warm": measure_async(warm, number=10)}
+
+
+def main(instances: int = 500, providers: int = 4):
+    with tempfile.TemporaryDirectory() as one, tempfile.TemporaryDirectory() as all_:
+        report(
+            "launchers.game_times",
+            {
+                "instances": instances,
+                "providers": providers,
+                "one": _measure(one, instances, 1),
+                "all": _measure(all_, instances, providers),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,231 @@
+# Usage: python -m benchmarks.load [--trace trace.jsonl] [--rounds N] [--interval S] [--concurrency N]
+# Runs MinecraftPlugin over in-memory streams and drives it like Galaxy does, replaying a trace of
+# requests. Reports per method latency percentiles, throughput and how long the event loop was
+# blocked. Run it with Python 3.7, like benchmarks.startup.
+#
+# A trace has one JSON object per line: {"at": seconds from start, "method": ..., "params": ...}.
+# Imports (start_*_import) are timed until their *_import_finished notification and, as Galaxy
+# does, never run twice at the same time.
+
+import os, json, time, asyncio, argparse, tempfile, statistics
+from unittest import mock
+
+from benchmarks.common import report
+from benchmarks.fixtures import FakeLocalClient, make_multimc, make_tree
+from consts import GameID, GAMES
+import multimc
+import plugin
+
+LAG_INTERVAL = 0.005  # in seconds
+IMPORTS = {
+    "start_game_times_import": "game_times_import_finished",
+    "start_local_size_import": "local_size_import_finished",
+    "start_os_compatibility_import": "os_compatibility_import_finished",
+}
+
+
+class MemoryWriter:
+    """Stream writer handing every line the plugin writes to `on_message`."""
+
+    def __init__(self, on_message):
+        self._on_message = on_message
+        self._buffer = b""
+
+    def write(self, data):
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            self._on_message(json.loads(line))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+class GalaxyClient:
+    """Sends requests to the plugin through `reader` and matches its responses and notifications."""
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+        self.writer = MemoryWriter(self._on_message)
+        self._next_id = 0
+        self._responses = {}
+        self._notifications = {}
+        self._import_locks = {method: asyncio.Lock() for method in IMPORTS}
+
+    def _on_message(self, message):
+        if "id" in message and message["id"] is not None:
+            future = self._responses.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(message)
+        elif message.get("method") in self._notifications:
+            future = self._notifications.pop(message["method"])
+            if not future.done():
+                future.set_result(message)
+
+    def _send(self, message):
+        self.reader.feed_data(json.dumps({"jsonrpc": "2.0", **message}).encode() + b"\n")
+
+    async def request(self, method, params=None):
+        self._next_id += 1
+        id = str(self._next_id)
+        future = self._responses[id] = asyncio.get_running_loop().create_future()
+        self._send({"id": id, "method": method, "params": params or {}})
+        response = await future
+        if "error" in response:
+            raise RuntimeError(f"{method} failed: {response['error']}")
+        return response.get("result")
+
+    async def call(self, method, params=None):
+        """Requests `method`, for imports until the plugin reported the import as finished."""
+        if method not in IMPORTS:
+            return await self.request(method, params)
+        async with self._import_locks[method]:
+            finished = asyncio.get_running_loop().create_future()
+            self._notifications[IMPORTS[method]] = finished
+            await self.request(method, params)
+            await finished
+
+
+def synthetic_trace(rounds: int, interval: float = 0.5):
+    """Galaxy's requests after a start, repeated every `interval` seconds."""
+    trace = []
+    for i in range(rounds):
+        at = i * interval
+        trace.append({"at": at, "method": "import_owned_games"})
+        trace.append({"at": at, "method": "import_local_games"})
+        for method in IMPORTS:
+            trace.append({"at": at, "method": method, "params": {"game_ids": GAMES}})
+    return trace
+
+
+def read_trace(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _measure_lag(lags):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(loop.time() - expected, 0))
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def at(p):
+        return values[min(int(p * len(values)), len(values) - 1)]
+
+    return {
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p99": at(0.99),
+        "max": values[-1],
+        "mean": statistics.mean(values),
+    }
+
+
+async def run(root, trace, *, concurrency: int, instances: int, files: int):
+    local_root = os.path.join(root, "local")
+    for game_id in GAMES:
+        make_tree(os.path.join(local_root, game_id), files // len(GAMES))
+    multimc_folder = make_multimc(os.path.join(root, "multimc"), instances)
+    installed_folder = os.path.join(root, "installed")
+    os.makedirs(installed_folder)
+
+    reader = asyncio.StreamReader()
+    client = GalaxyClient(reader)
+    with mock.patch.object(plugin, "INSTALLED_FOLDER_PATH", installed_folder):
+        instance = plugin.MinecraftPlugin(reader, client.writer, "token")
+        instance.owned = [GameID.Minecraft, GameID.MinecraftDungeons]
+        instance.local_client = FakeLocalClient(local_root)
+        instance.launchers = {"multimc": multimc.MultiMCClient(multimc_folder)}
+        plugin_task = asyncio.ensure_future(instance.run())
+        await client.request("get_capabilities")
+        await client.request("initialize_cache", {"data": {}})
+
+    lags = []
+    lag_task = asyncio.ensure_future(_measure_lag(lags))
+    latencies = {}
+    errors = {}
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def replay(entry):
+        await asyncio.sleep(max(entry.get("at", 0) - (time.perf_counter() - start), 0))
+        async with slots:
+            sent = time.perf_counter()
+            try:
+                await client.call(entry["method"], entry.get("params"))
+            except RuntimeError:
+                errors[entry["method"]] = errors.get(entry["method"], 0) + 1
+                return
+            latencies.setdefault(entry["method"], []).append(time.perf_counter() - sent)
+
+    await asyncio.gather(*(replay(entry) for entry in trace))
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+
+    await client.request("shutdown")
+    reader.feed_eof()
+    await plugin_task
+    await instance.wait_closed()
+
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "requests": len(trace),
+        "concurrency": concurrency,
+        "throughput": completed / elapsed,
+        "methods": {
+            method: {
+                "count": len(latencies.get(method, [])),
+                "errors": errors.get(method, 0),
+                **_percentiles(latencies.get(method, [])),
+            }
+            for method in sorted(latencies.keys() | errors.keys())
+        },
+        "errors": sum(errors.values()),
+        "loop_lag": _percentiles(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--trace", help="JSON lines trace to replay instead of a synthetic one")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds of the synthetic trace")
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="seconds between synthetic rounds, 0 for none"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight")
+    parser.add_argument("--instances", type=int, default=200, help="MultiMC instances")
+    parser.add_argument("--files", type=int, default=5000, help="files in the launcher folders")
+    args = parser.parse_args()
+
+    trace = read_trace(args.trace) if args.trace else synthetic_trace(args.rounds, args.interval)
+    with tempfile.TemporaryDirectory() as root:
+        results = asyncio.run(
+            run(
+                root,
+                trace,
+                concurrency=args.concurrency,
+                instances=args.instances,
+                files=args.files,
+            )
+        )
+    report("plugin.load", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Usage: python -m benchmarks.multimc_time [instances]
+# Times MultiMCClient.get_time with a cold and with a warm instance.cfg cache.
+
+import sys, tempfile
+
+from benchmarks.common import measure_async, report
+from benchmarks.fixtures import make_multimc
+import multimc
+
+
+def main(instances: int = 500):
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = make_multimc(tmp, instances)
+
+        async def cold():
+            await multimc.MultiMCClient(folder).get_time()
+
+        client = multimc.MultiMCClient(folder)
+        report(
+            "multimc.get_time",
+            {
+                "instances": instances,
+                "cold": measure_async(cold),
+                "warm": measure_async(client.get_time),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
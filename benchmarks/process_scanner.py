@@ -0,0 +1,28 @@
+# Usage: python -m benchmarks.process_scanner
+# Times a cold scan of /proc against incremental rescans that only look up new PIDs.
+
+from benchmarks.common import measure, report
+from utils import process_scanner
+
+
+def main():
+    backend = process_scanner.ProcfsBackend()
+    matchers = {"launcher": process_scanner.path_matcher(["/opt/minecraft-launcher"])}
+
+    def cold():
+        process_scanner.ProcessScanner(backend).find(matchers)
+
+    scanner = process_scanner.ProcessScanner(backend)
+    scanner.find(matchers)
+    report(
+        "process_scanner.procfs",
+        {
+            "processes": len(scanner.scan()),
+            "cold": measure(cold, number=10),
+            "incremental": measure(lambda: scanner.find(matchers), number=10),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
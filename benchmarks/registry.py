@@ -0,0 +1,62 @@
+# Usage: python -m benchmarks.registry [programs]
+# Looks up the Minecraft uninstaller in a synthetic registry with `programs` Uninstall entries per
+# hive and software path: with a cold index (a full enumeration, as every uninstall used to do),
+# a warm one, and after a program was installed.
+
+import sys
+
+from benchmarks.common import measure, report
+from benchmarks.fixtures import FakeWinreg, make_uninstall_hive
+from consts import GameID, SOFTWARE_PATHS, WIN_UNINSTALL_RELATIVE_LOCATION
+from local import WindowsLocalClient
+import registry
+
+
+def _client(fake):
+    backend = registry.RegistryBackend(
+        fake, hives=[FakeWinreg.HKEY_CURRENT_USER, FakeWinreg.HKEY_LOCAL_MACHINE]
+    )
+    return WindowsLocalClient(registry_backend=backend)
+
+
+def _calls(fake, fn):
+    calls = fake.calls
+    fn()
+    return fake.calls - calls
+
+
+def main(programs: int = 300):
+    fake = make_uninstall_hive(programs)
+    client = _client(fake)
+    assert client._find_uninstall_string(GameID.Minecraft) is not None
+
+    def cold():
+        _client(fake)._find_uninstall_string(GameID.Minecraft)
+
+    def warm():
+        client._find_uninstall_string(GameID.Minecraft)
+
+    def after_install():
+        fake.create_key(
+            FakeWinreg.HKEY_CURRENT_USER,
+            SOFTWARE_PATHS[0] + WIN_UNINSTALL_RELATIVE_LOCATION + f"\\{{NEW{fake.calls}}}",
+            {"DisplayName": "New program"},
+        )
+        client._find_uninstall_string(GameID.Minecraft)
+
+    report(
+        "registry.uninstall_lookup",
+        {
+            "programs": programs,
+            "cold": {**measure(cold), "registry_calls": _calls(fake, cold)},
+            "warm": {**measure(warm, number=100), "registry_calls": _calls(fake, warm)},
+            "after_install": {
+                **measure(after_install),
+                "registry_calls": _calls(fake, after_install),
+            },
+        },
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
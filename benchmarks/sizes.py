@@ -0,0 +1,27 @@
+# Usage: python -m benchmarks.sizes [files]
+# Sizes a synthetic launcher folder cold, and warm through a revalidated SizeIndex.
+
+import os, sys, tempfile
+
+from benchmarks.common import measure_async, report
+from benchmarks.fixtures import make_tree
+from utils import dirsize
+
+
+def main(files: int = 20000):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "launcher")
+        make_tree(root, files)
+        index = dirsize.SizeIndex(os.path.join(tmp, "index.json"))
+        report(
+            "sizes.launcher",
+            {
+                "files": files,
+                "get_size_at_path": measure_async(lambda: dirsize.get_size_at_path(root), repeat=3),
+                "index_refresh": measure_async(lambda: index.refresh(root), repeat=3),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,94 @@
+# Usage: python -m benchmarks.startup [runs]
+# Starts the plugin as Galaxy does, with a token and the port of a local server, and measures the
+# time from process start to the plugin connecting and to it answering after the handshake.
+# Run it with the Python version Galaxy ships (3.7), the galaxy.plugin.api package doesn't
+# parse requests on Python 3.9+. INSTALLED_FOLDER_PATH is redirected to a temporary
+# directory.
+
+import os, sys, json, time, shutil, asyncio, compileall, statistics, tempfile
+
+from benchmarks.common import SRC, report
+
+HANDSHAKE_TIMEOUT = 30  # in seconds
+
+
+async def _request(reader, writer, id, method, params=None):
+    message = {"jsonrpc": "2.0", "id": id, "method": method, "params": params or {}}
+    writer.write(json.dumps(message).encode() + b"\n")
+    while True:
+        response = json.loads(await reader.readline())
+        if "error" in response:
+            raise RuntimeError(f"{method} failed: {response['error']}")
+        if response.get("id") == id:
+            return response
+
+
+async def start_plugin(plugin_dir, env) -> dict:
+    """Returns the seconds from process start until the plugin connected and was ready."""
+    connected = asyncio.get_running_loop().create_future()
+
+    def on_connect(reader, writer):
+        connected.set_result((time.perf_counter(), reader, writer))
+
+    server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(plugin_dir, "plugin.py"), "token", str(port), env=env
+    )
+    try:
+        connect_time, reader, writer = await asyncio.wait_for(connected, HANDSHAKE_TIMEOUT)
+        await _request(reader, writer, "1", "get_capabilities")
+        # Answered once handshake_complete returned.
+        await asyncio.wait_for(
+            _request(reader, writer, "2", "initialize_cache", {"data": {}}), HANDSHAKE_TIMEOUT
+        )
+        ready_time = time.perf_counter()
+        await _request(reader, writer, "3", "shutdown")
+        writer.close()
+        await asyncio.wait_for(process.wait(), HANDSHAKE_TIMEOUT)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        server.close()
+    return {"connect": connect_time - start, "ready": ready_time - start}
+
+
+def _summary(timings):
+    return {
+        key: {
+            "min": min(t[key] for t in timings),
+            "median": statistics.median(t[key] for t in timings),
+        }
+        for key in timings[0]
+    }
+
+
+async def run(runs: int):
+    root = tempfile.mkdtemp()
+    plugin_dir = os.path.join(root, "plugin")
+    env = dict(os.environ, HOME=root, LOCALAPPDATA=root)
+    env.pop("MINECRAFT_PLUGIN_METRICS", None)
+    for data_dir in [os.path.join("Library", "Application Support"), ""]:
+        os.makedirs(os.path.join(root, data_dir, "GOG.com", "Galaxy", "plugins", "installed"))
+    try:
+        # Cold: no bytecode, as with a build made with --no-compile.
+        shutil.copytree(SRC, plugin_dir, ignore=shutil.ignore_patterns("__pycache__"))
+        cold = await start_plugin(plugin_dir, env)
+        # Precompiled: bytecode shipped with the build.
+        shutil.rmtree(plugin_dir)
+        shutil.copytree(SRC, plugin_dir, ignore=shutil.ignore_patterns("__pycache__"))
+        compileall.compile_dir(plugin_dir, quiet=1)
+        warm = [await start_plugin(plugin_dir, env) for _ in range(runs)]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    report("plugin.startup", {"cold": cold, "precompiled": _summary(warm)})
+
+
+def main(runs: int = 5):
+    asyncio.run(run(runs))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,48 @@
+# Usage: python -m benchmarks.time_cache [games]
+# Compares the legacy hex encoded pickle play time cache with the compact JSON format.
+
+import os, sys, pickle, tempfile
+
+from benchmarks.common import measure, report
+from benchmarks.fixtures import make_time_cache
+from utils import time_cache
+
+
+def main(games: int = 1000):
+    cache = make_time_cache(games)
+    legacy = pickle.dumps(cache).hex()
+    compact = time_cache.dumps(cache)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.txt")
+
+        def legacy_save():
+            with open(path, "w+") as file:
+                file.write(time_cache.FILE_HEADER)
+                file.write(pickle.dumps(cache).hex())
+
+        def legacy_load():
+            time_cache.read_file(path)
+
+        def compact_save():
+            time_cache.write_file(path, cache)
+
+        compact_load = legacy_load
+
+        for name, save, load, data in [
+            ("legacy", legacy_save, legacy_load, legacy),
+            ("compact", compact_save, compact_load, compact),
+        ]:
+            save()
+            report(
+                f"time_cache.{name}",
+                {
+                    "games": games,
+                    "size": len(data),
+                    "save": measure(save, number=20),
+                    "load": measure(load, number=20),
+                },
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,32 @@
+# Usage: python -m benchmarks.update [instances]
+# Runs the status update loop and its probes against a fake local client and MultiMC folder.
+
+import os, sys, tempfile
+
+from benchmarks.common import measure_async, report
+from benchmarks.fixtures import make_multimc, make_plugin
+from consts import GameID
+
+
+def main(instances: int = 100):
+    with tempfile.TemporaryDirectory() as root:
+        local_root = os.path.join(root, "local")
+        os.makedirs(os.path.join(local_root, GameID.Minecraft))
+        os.makedirs(os.path.join(root, "installed"))
+        plugin = make_plugin(
+            os.path.join(root, "installed"),
+            local_root=local_root,
+            multimc_folder=make_multimc(os.path.join(root, "multimc"), instances),
+        )
+        report(
+            "plugin.update",
+            {
+                "update": measure_async(plugin._update, number=100),
+                "install_probe": measure_async(plugin._install_probe, number=100),
+                "process_probe": measure_async(plugin._process_probe, number=10),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
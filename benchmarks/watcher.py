@@ -0,0 +1,70 @@
+# Usage: python -m benchmarks.watcher [seconds]
+# Compares the wakeups of a fixed rate and an adaptive PollingWatcher over an idle period, and
+# how long each takes to see a change made by the plugin (followed by hurry) or from outside.
+# Intervals are scaled down 100x from the plugin's.
+
+import sys, time, asyncio
+
+from benchmarks.common import report
+from utils import watcher
+
+SCALE = 0.01
+
+
+async def _watch(adaptive: bool, idle_seconds: float):
+    state = {"value": 0, "polls": 0, "seen": None}
+
+    async def probe():
+        state["polls"] += 1
+        return state["value"]
+
+    def on_change(value):
+        state["seen"] = time.perf_counter()
+
+    kwargs = {}
+    if adaptive:
+        kwargs = {
+            "max_interval": watcher.MAX_WATCH_INTERVAL * SCALE,
+            "fast_interval": watcher.FAST_WATCH_INTERVAL * SCALE,
+        }
+    w = watcher.PollingWatcher(probe, on_change, watcher.WATCH_INTERVAL * SCALE, **kwargs)
+    w.start()
+    await asyncio.sleep(idle_seconds)
+    idle_polls = state["polls"]
+
+    # A change by the plugin, which hurries the watcher.
+    changed = time.perf_counter()
+    state["value"] += 1
+    w.hurry()
+    while state["seen"] is None or state["seen"] < changed:
+        await asyncio.sleep(0.001)
+    hurried = state["seen"] - changed
+
+    # A change from outside, after backing off again.
+    await asyncio.sleep(idle_seconds / 2)
+    changed = time.perf_counter()
+    state["value"] += 1
+    while state["seen"] < changed:
+        await asyncio.sleep(0.001)
+    external = state["seen"] - changed
+    w.stop()
+    return {
+        "idle_wakeups_per_minute": idle_polls / idle_seconds * 60 * SCALE,
+        "plugin_change_latency": hurried / SCALE,
+        "external_change_latency": external / SCALE,
+    }
+
+
+async def run(idle_seconds: float):
+    return {
+        "fixed": await _watch(False, idle_seconds),
+        "adaptive": await _watch(True, idle_seconds),
+    }
+
+
+def main(idle_seconds: float = 5):
+    report("watcher.backoff", asyncio.run(run(idle_seconds)))
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -25,6 +25,12 @@ INSTALLED_FOLDER_PATH = os.path.abspath(
     else os.path.expanduser("~/Library/Application Support/GOG.com/Galaxy/plugins/installed")
 )
 
+MINECRAFT_DIR = (
+    os.path.expandvars("%APPDATA%\\.minecraft")
+    if IS_WINDOWS
+    else os.path.expanduser("~/Library/Application Support/minecraft")
+)
+
 DIRNAME = os.path.abspath(os.path.join(__file__, ".."))
 
 SOFTWARE_PATHS = ["SOFTWARE\\", "SOFTWARE\\WOW6432Node\\"]
@@ -35,11 +41,27 @@ GAME_REGISTY_RELATIVE_LOCATIONS = {
 }
 REGISTRY_EXE_KEYS = {GameID.Minecraft: "InstallExe", GameID.MinecraftDungeons: "InstallFile"}
 WIN_UNINSTALL_RELATIVE_LOCATION = "Microsoft\\Windows\\CurrentVersion\\Uninstall"
+UNINSTALL_DISPLAY_NAMES = {
+    GameID.Minecraft: "Minecraft Launcher",
+    GameID.MinecraftDungeons: "Minecraft Dungeons Launcher",
+}
 MINECRAFT_WIN_INSTALL_URL = "https://launcher.mojang.com/download/MinecraftInstaller.msi"
 MINECRAFT_MAC_INSTALL_URL = "https://launcher.mojang.com/download/Minecraft.dmg"
 MINECRAFT_DUNGEONS_INSTALL_URL = (
     "https://launcher.mojang.com/download/MinecraftDungeonsInstaller.msi"
 )
 
+LOCAL_SIZE_TIMEOUT = 60  # in seconds
+
+# How long the setup wizard searches for MultiMC to pre-fill its path.
+MULTIMC_DISCOVERY_TIMEOUT = 2  # in seconds
+
+INSTALLER_CACHE_MAX_SIZE = 512 * 1024 * 1024  # in bytes
+
+# Launching Minecraft twice within this window opens MultiMC instead of the launcher.
+DOUBLE_CLICK_WINDOW = 0.5  # in seconds
+
+# Set MINECRAFT_PLUGIN_METRICS=1 to write handler latencies to minecraft_metrics.json.
+METRICS_ENABLED = os.environ.get("MINECRAFT_PLUGIN_METRICS") == "1"
 
 GAME_NAMES = {GameID.Minecraft: "Minecraft", GameID.MinecraftDungeons: "Minecraft Dungeons"}
@@ -0,0 +1,68 @@
+import logging, importlib
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from galaxy.api.plugin import GameTime
+
+from utils import discovery
+
+log = logging.getLogger(__name__)
+
+# Providers by the name they are configured with, as "module:class" so only configured ones are
+# imported.
+PROVIDERS = {"multimc": "multimc:MultiMCClient"}
+
+
+class PathNotExectuable(Exception):
+    pass
+
+
+class LauncherProvider(ABC):
+    """
+    A third party launcher running Minecraft, e.g. MultiMC, configured with the `path` of its
+    executable. Providers keep their own caches (e.g. parsed instance files) so the plugin can
+    query all of them concurrently on every request. Blocking work runs on the probe executor.
+    """
+
+    name: str = None
+
+    def __init__(self, path: str):
+        self.path = path
+        # Where the launcher and its instances live, for sizes and to recognize its processes.
+        self.folder = path
+
+    @classmethod
+    @abstractmethod
+    def make_discovery(cls, cache_path) -> discovery.Discovery:
+        """Searches for installations of the launcher, whose paths can be passed to `cls`."""
+
+    @abstractmethod
+    async def get_time(self) -> GameTime:
+        """Play time of Minecraft in the launcher, summed over its instances."""
+
+    def size_roots(self) -> List[str]:
+        return [self.folder]
+
+    def running(self) -> bool:
+        """Whether the launcher was started by `launch` and is still running."""
+        return False
+
+    @abstractmethod
+    async def launch(self):
+        """Starts the launcher and returns its process."""
+
+
+def provider_class(name):
+    module, _, cls = PROVIDERS[name].partition(":")
+    return getattr(importlib.import_module(module), cls)
+
+
+def load(paths: Dict[str, str]) -> Dict[str, LauncherProvider]:
+    """Creates the providers configured in `paths`, by name, skipping unknown ones."""
+    providers = {}
+    for name, path in paths.items():
+        if name not in PROVIDERS:
+            log.warning(f"Unknown launcher provider {name}, ignoring it")
+            continue
+        providers[name] = provider_class(name)(path)
+    return providers
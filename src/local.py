@@ -1,22 +1,63 @@
 import os, logging
+from collections import namedtuple
+from typing import Callable, Optional
 
 from consts import (
     GameID,
-    REGISTRY_START_PATHS,
     SOFTWARE_PATHS,
     GAME_REGISTY_RELATIVE_LOCATIONS,
     REGISTRY_EXE_KEYS,
     WIN_UNINSTALL_RELATIVE_LOCATION,
-    IS_WINDOWS,
+    UNINSTALL_DISPLAY_NAMES,
+    mojang_registry_relative_location,
 )
 from utils import misc
+from utils.probes import probe_executor
+import registry
 
 
-if IS_WINDOWS:
-    import winreg
-
 log = logging.getLogger(__name__)
 
+MAC_MINECRAFT_PATH = "/Applications/Minecraft.app"
+TRASH_TIMEOUT = 60  # in seconds
+
+# `source` is where the location was read from, e.g. the (hive, key path) of a registry key.
+InstallLocation = namedtuple("InstallLocation", ["folder", "exe", "source"])
+
+
+class InstallLocationResolver:
+    """
+    Caches the install location of each game. `resolve(game_id)` does the full lookup and
+    `signature(game_id, location)` a cheap probe (`location` is None if the game wasn't found)
+    whose result changes whenever the location may have; the cached location is only resolved
+    again once it does.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[str], Optional[InstallLocation]],
+        signature: Callable[[str, Optional[InstallLocation]], object],
+    ):
+        self._resolve = resolve
+        self._signature = signature
+        self._cache = {}
+
+    def get(self, game_id) -> Optional[InstallLocation]:
+        if game_id in self._cache:
+            location, signature = self._cache[game_id]
+            if self._signature(game_id, location) == signature:
+                return location
+        location = self._resolve(game_id)
+        self._cache[game_id] = (location, self._signature(game_id, location))
+        log.debug(f"Resolved install location for {game_id}: {location}")
+        return location
+
+    def invalidate(self, game_id=None):
+        if game_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(game_id, None)
+
 
 class LocalClient:
     def __init__(self):
@@ -24,84 +65,114 @@ class LocalClient:
             GameID.Minecraft: None,
             GameID.MinecraftDungeons: None,
         }
+        self.install_locations = InstallLocationResolver(
+            self._resolve_install_location, self._install_signature
+        )
+
+    def _resolve_install_location(self, game_id) -> Optional[InstallLocation]:
+        return None
+
+    def _install_signature(self, game_id, location: Optional[InstallLocation]):
+        return None
+
+    def find_launcher_path(self, game_id, *, folder=False) -> str:
+        location = self.install_locations.get(game_id)
+        if location is None:
+            return None
+        return location.folder if folder else location.exe
 
-    def find_launcher_path(self, game_id, *, folder=False, folder_path=None, exe=None) -> str:
-        if exe is None and folder_path is not None:
-            folder_path = None
-        if exe is not None and folder_path is None:
-            folder_path = exe
-        if exe is not None and folder_path is not None:
-            folder_path = os.path.abspath(folder_path)
-            exe = os.path.abspath(exe)
-        log.debug(f"folder path for {game_id}: {folder_path}")
-        log.debug(f"path for {game_id}: {exe}")
-        return exe if not folder else folder_path
+    async def get_launcher_path(self, game_id, *, folder=False) -> str:
+        """Like `find_launcher_path`, run on the probe executor."""
+        return await probe_executor.run(self.find_launcher_path, game_id, folder=folder)
 
     def is_game_still_running(self, game_id) -> bool:
         return self.running_games[game_id] and self.running_games[game_id].poll() is None
 
-    def launch(self, game_id):
+    async def launch(self, game_id):
         log.info(f"Launching {game_id}")
-        self.running_games[game_id] = misc.open_path(self.find_launcher_path(game_id))
+        self.running_games[game_id] = await misc.open_path(await self.get_launcher_path(game_id))
+        return self.running_games[game_id]
 
-    def uninstall(game_id):
+    async def uninstall(self, game_id):
+        pass
+
+    def close(self):
         pass
 
 
 class WindowsLocalClient(LocalClient):
-    def find_launcher_path(self, game_id, folder=False):
-        for start_path in REGISTRY_START_PATHS:
-            for software_path in SOFTWARE_PATHS:
-                reg = winreg.ConnectRegistry(None, start_path)
-                try:
-                    with winreg.OpenKey(
-                        reg, software_path + GAME_REGISTY_RELATIVE_LOCATIONS[game_id]
-                    ) as key:
-                        directory = winreg.QueryValueEx(key, "InstallLocation")[0]
-                        return super().find_launcher_path(
-                            game_id,
-                            folder=folder,
-                            folder_path=directory,
-                            exe=os.path.join(
-                                directory, winreg.QueryValueEx(key, REGISTRY_EXE_KEYS[game_id])[0]
-                            ),
-                        )
-                except OSError:
-                    pass
-        return super().find_launcher_path(game_id, folder=folder)
-
-    def uninstall(self, game_id):
-        targetDisplayName = None
-        if game_id == GameID.Minecraft:
-            targetDisplayName = "Minecraft Launcher"
-        elif game_id == GameID.MinecraftDungeons:
-            targetDisplayName = "Minecraft Dungeons Launcher"
-        for start_path in REGISTRY_START_PATHS:
+    def __init__(self, registry_backend: registry.RegistryBackend = None):
+        self.registry = registry_backend or registry.RegistryBackend()
+        self.uninstall_index = registry.UninstallIndex(
+            self.registry,
+            [software_path + WIN_UNINSTALL_RELATIVE_LOCATION for software_path in SOFTWARE_PATHS],
+        )
+        super().__init__()
+
+    def _resolve_install_location(self, game_id):
+        for start_path in self.registry.hives:
             for software_path in SOFTWARE_PATHS:
-                reg = winreg.ConnectRegistry(None, start_path)
+                key_path = software_path + GAME_REGISTY_RELATIVE_LOCATIONS[game_id]
                 try:
-                    key = winreg.OpenKey(reg, software_path + WIN_UNINSTALL_RELATIVE_LOCATION)
+                    with self.registry.open_key(start_path, key_path) as key:
+                        directory = self.registry.query_value(key, "InstallLocation")
+                        exe = self.registry.query_value(key, REGISTRY_EXE_KEYS[game_id])
                 except OSError:
                     continue
-                for i in range(0, winreg.QueryInfoKey(key)[0]):
-                    try:
-                        subkey_name = winreg.EnumKey(key, i)
-                        with winreg.OpenKey(key, subkey_name) as subkey:
-                            if winreg.QueryValueEx(subkey, "DisplayName")[0] == targetDisplayName:
-                                misc.run(winreg.QueryValueEx(subkey, "UninstallString")[0])
-                                return
-                    except OSError:
-                        pass
-                winreg.CloseKey(key)
+                return InstallLocation(
+                    os.path.abspath(directory),
+                    os.path.abspath(os.path.join(directory, exe)),
+                    (start_path, key_path),
+                )
+        return None
+
+    def _install_signature(self, game_id, location):
+        # Installing or removing a product touches the InstalledProducts key, updating a product
+        # touches its own key.
+        if location is None:
+            return tuple(
+                self.registry.last_write_time_at(
+                    start_path, software_path + mojang_registry_relative_location
+                )
+                for start_path in self.registry.hives
+                for software_path in SOFTWARE_PATHS
+            )
+        return self.registry.last_write_time_at(*location.source), os.path.exists(location.exe)
+
+    def _find_uninstall_string(self, game_id) -> Optional[str]:
+        entry = self.uninstall_index.find(UNINSTALL_DISPLAY_NAMES.get(game_id))
+        return entry.uninstall_string if entry is not None else None
+
+    async def uninstall(self, game_id):
+        uninstall_string = await probe_executor.run(self._find_uninstall_string, game_id)
+        if uninstall_string is None:
+            log.warning(f"No uninstaller found for {game_id}")
+            return
+        await misc.run(uninstall_string)
+        self.install_locations.invalidate(game_id)
+
+    def close(self):
+        self.registry.close()
 
 
 class MacLocalClient(LocalClient):
-    def find_launcher_path(self, game_id, *, folder=False):
-        if game_id == GameID.Minecraft:
-            potential_path = "/Applications/Minecraft.app"
-            if os.path.exists(potential_path):
-                return super().find_launcher_path(game_id, folder=folder, exe=potential_path)
-        return super().find_launcher_path(game_id, folder=folder)
-
-    def uninstall(self, game_id):
-        misc.send2trash(self.find_launcher_path(game_id, folder=True))
+    def _resolve_install_location(self, game_id):
+        if game_id == GameID.Minecraft and os.path.exists(MAC_MINECRAFT_PATH):
+            return InstallLocation(MAC_MINECRAFT_PATH, MAC_MINECRAFT_PATH, None)
+        return None
+
+    def _install_signature(self, game_id, location):
+        if game_id != GameID.Minecraft:
+            return None
+        try:
+            return os.stat(MAC_MINECRAFT_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    async def uninstall(self, game_id):
+        await probe_executor.run(
+            misc.send2trash,
+            await self.get_launcher_path(game_id, folder=True),
+            timeout=TRASH_TIMEOUT,
+        )
+        self.install_locations.invalidate(game_id)
@@ -1,51 +1,146 @@
-import os, logging
+import os, string, logging
+from collections import namedtuple
 
 from galaxy.api.plugin import GameTime
 
 from consts import IS_WINDOWS, GameID
-from utils import misc
+from launchers import LauncherProvider, PathNotExectuable  # noqa: F401 - raised by MultiMCClient
+from utils import discovery, misc, probes
+from utils.instrumentation import metrics
+from utils.probes import probe_executor
 
 log = logging.getLogger(__name__)
 
 
-class PathNotExectuable(Exception):
-    pass
+# Parsed totals of an instance.cfg, valid for as long as its mtime and size are unchanged.
+InstanceTime = namedtuple("InstanceTime", ["mtime", "size", "time", "last_played"])
 
 
-class MultiMCClient:
+def read_instance_time(cfg_path):
+    """Returns `totalTimePlayed` and `lastLaunchTime`, stopping as soon as both were read."""
+    time = None
+    lastPlayed = None
+    with open(cfg_path, "r") as f:
+        for line in f:
+            key, _, value = line.strip().partition("=")
+            if key == "totalTimePlayed":
+                time = int(value)
+            elif key == "lastLaunchTime":
+                lastPlayed = int(value)
+            else:
+                continue
+            if time is not None and lastPlayed is not None:
+                break
+    return time or 0, lastPlayed
+
+
+def instances_path(path):
+    """The instances folder of the MultiMC executable (MultiMC.app on macOS) at `path`."""
+    if IS_WINDOWS:
+        return os.path.join(os.path.dirname(path), "instances")
+    return os.path.join(path, "Contents", "MacOS", "instances")
+
+
+def is_installation(path) -> bool:
+    return os.access(path, os.X_OK) and os.path.isdir(instances_path(path))
+
+
+def match_installation(folder, entry: os.DirEntry):
+    """Discovery matcher for MultiMC executables next to an instances folder."""
+    name = entry.name.lower()
+    if (name == "multimc.exe") if IS_WINDOWS else (name == "multimc.app"):
+        if is_installation(entry.path):
+            return entry.path
+    return None
+
+
+def discovery_roots():
+    """Where MultiMC is usually extracted to, the likeliest first, with their search depth."""
+    home = os.path.expanduser("~")
+    if not IS_WINDOWS:
+        return [
+            ("/Applications", 1),
+            (os.path.join(home, "Applications"), 2),
+            (os.path.join(home, "Downloads"), 3),
+            (os.path.join(home, "Desktop"), 3),
+            (home, 4),
+        ]
+    roots = [
+        (os.path.join(home, "Downloads"), 3),
+        (os.path.join(home, "Desktop"), 3),
+        (os.path.join(home, "Documents"), 3),
+        (os.path.expandvars("%LOCALAPPDATA%\\Programs"), 2),
+        (os.path.expandvars("%ProgramFiles%"), 2),
+        (os.path.expandvars("%ProgramFiles(x86)%"), 2),
+        (home, 4),
+    ]
+    drives = [f"{letter}:\\" for letter in string.ascii_uppercase]
+    roots += [(os.path.join(drive, "PortableApps"), 2) for drive in drives]
+    roots += [(drive, 3) for drive in drives]
+    return roots
+
+
+class MultiMCClient(LauncherProvider):
+    name = "multimc"
+
     def __init__(self, path: str):
-        self.path = os.path.expanduser(os.path.expandvars(os.path.abspath(path)))
+        super().__init__(os.path.expanduser(os.path.expandvars(os.path.abspath(path))))
         if not os.access(path, os.X_OK):
             raise PathNotExectuable
         self.folder = os.path.dirname(self.path) if IS_WINDOWS else self.path
         log.debug(f"MultiMC Path: {self.path}")
-        self.instances_path = (
-            os.path.join(self.folder, "instances")
-            if IS_WINDOWS
-            else os.path.join(self.folder, "Contents", "MacOS", "instances")
-        )
+        self.instances_path = instances_path(self.path)
         log.debug(f"MultiMC instances path: {self.instances_path}")
         self.process = None
+        self._instance_times = {}
 
-    def get_time(self):
+    @classmethod
+    def make_discovery(cls, cache_path) -> discovery.Discovery:
+        return discovery.Discovery(discovery_roots, match_installation, is_installation, cache_path)
+
+    def _get_time(self):
         time = 0  # in seconds
         lastPlayed = None
-        for f in os.scandir(self.instances_path):
+        instance_times = {}
+        try:
+            entries = list(os.scandir(self.instances_path))
+        except FileNotFoundError:
+            log.warning(f"MultiMC instances folder not found: {self.instances_path}")
+            entries = []
+        for f in entries:
+            if probes.cancelled():
+                break
             if f.is_dir():
                 cfg_path = os.path.join(f.path, "instance.cfg")
-                if os.path.isfile(cfg_path):
-                    with open(cfg_path, "r") as f:
-                        for line in f.readlines():
-                            split_line = line.strip().split("=")
-                            if split_line[0] == "totalTimePlayed":
-                                time += int(split_line[1])
-                            elif split_line[0] == "lastLaunchTime":
-                                lastPlayed = misc.compare(lastPlayed, int(split_line[1]))
+                try:
+                    cfg_stat = os.stat(cfg_path)
+                except OSError:
+                    continue
+                signature = (cfg_stat.st_mtime_ns, cfg_stat.st_size)
+                cached = self._instance_times.get(cfg_path)
+                if cached is None or (cached.mtime, cached.size) != signature:
+                    try:
+                        cached = InstanceTime(*signature, *read_instance_time(cfg_path))
+                    except (OSError, ValueError) as e:
+                        log.warning(f"Could not read {cfg_path}: {e}")
+                        continue
+                instance_times[cfg_path] = cached
+                time += cached.time
+                lastPlayed = misc.compare(lastPlayed, cached.last_played)
+        self._instance_times = instance_times
         log.debug(f"Got total MultiMC Time: {time / 60}")
-        return GameTime(GameID, time / 60, lastPlayed)
+        return GameTime(GameID.Minecraft, time / 60, lastPlayed)
+
+    def _get_time_probed(self):
+        with metrics.probe("filesystem.instance_cfg"):
+            return self._get_time()
+
+    async def get_time(self):
+        return await probe_executor.run(self._get_time_probed)
 
-    def launch(self):
-        self.process = misc.open_path(self.path)
+    async def launch(self):
+        self.process = await misc.open_path(self.path)
+        return self.process
 
     def running(self):
         if self.process is None:
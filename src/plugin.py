@@ -1,4 +1,5 @@
-import sys, asyncio, logging, urllib, os, json, pickle, webbrowser
+import sys, asyncio, logging, os, json
+from typing import TYPE_CHECKING, Dict
 from galaxy.api.plugin import (
     Plugin,
     LocalGame,
@@ -21,12 +22,32 @@ from consts import (
     IS_WINDOWS,
     INSTALLED_FOLDER_PATH,
     GAMES,
+    LOCAL_SIZE_TIMEOUT,
+    MULTIMC_DISCOVERY_TIMEOUT,
+    MINECRAFT_DIR,
+    METRICS_ENABLED,
+    DOUBLE_CLICK_WINDOW,
+    INSTALLER_CACHE_MAX_SIZE,
+)
+from utils import (
+    misc,
+    time_tracker,
+    time_cache,
+    time_journal,
+    log_time,
+    dirsize,
+    watcher,
+    process_scanner,
+    installer_cache,
 )
-from utils import misc, time_tracker
 from utils.decorators import double_click_effect
-import multimc
+from utils.instrumentation import metrics
+from utils.probes import probe_executor
 from version import __version__
 
+if TYPE_CHECKING:
+    import launchers
+
 
 log = logging.getLogger(__name__)
 
@@ -43,7 +64,28 @@ class MinecraftPlugin(Plugin):
         self.update_task: asyncio.Task = None
         self.check_sizes_task: asyncio.Task = None
         self.owned = []
-        self.multimc: multimc.MultiMCClient = None
+        self.double_click_window = DOUBLE_CLICK_WINDOW
+        # Configured third party launchers by provider name, the first one is launched.
+        self.launchers: Dict[str, "launchers.LauncherProvider"] = {}
+        # Both watchers back off while no game is running and hurry after the plugin acted.
+        self.install_watcher = watcher.PollingWatcher(
+            self._install_probe,
+            lambda _: self.create_task(self._update(), "Update Task"),
+            name="install",
+            max_interval=watcher.MAX_WATCH_INTERVAL,
+            idle=self._idle,
+        )
+        # Finds games and launchers that weren't started by the plugin.
+        self.process_scanner = process_scanner.ProcessScanner()
+        self.external_processes = frozenset()
+        self.process_watcher = watcher.PollingWatcher(
+            self._process_probe,
+            self._on_processes_change,
+            process_scanner.SCAN_INTERVAL,
+            name="processes",
+            max_interval=watcher.MAX_WATCH_INTERVAL,
+            idle=self._idle,
+        )
 
     def _authenticate(self):
         return Authentication("Minecraft_ID", "Minecraft Player")
@@ -56,17 +98,32 @@ class MinecraftPlugin(Plugin):
 
             if misc.IS(["owned", "multimcpath"], IN=stored_credentials):
                 self.owned = json.loads(stored_credentials["owned"])
-                if stored_credentials["multimcpath"] != "null":
-                    self.multimc = multimc.MultiMCClient(stored_credentials["multimcpath"])
+                if "launchers" in stored_credentials:
+                    paths = json.loads(stored_credentials["launchers"])
+                elif stored_credentials["multimcpath"] != "null":
+                    paths = {"multimc": stored_credentials["multimcpath"]}
+                else:
+                    paths = {}
+                if paths:
+                    import launchers
+
+                    self.launchers = launchers.load(paths)
                 return self._authenticate()
         return misc.get_next_step("Select Owned Games", 715, 725, "page1")
 
     async def pass_login_credentials(self, step, credentials, cookies):
+        # Only needed by the auth wizard, so not imported on every start.
+        import urllib.parse, webbrowser
+        import multimc
+
         def auth():
+            multimc_client = self.launchers.get("multimc")
             self.store_credentials(
                 {
                     "owned": json.dumps(self.owned),
-                    "multimcpath": "null" if self.multimc is None else self.multimc.path,
+                    # Read by versions before launcher providers.
+                    "multimcpath": "null" if multimc_client is None else multimc_client.path,
+                    "launchers": json.dumps({name: p.path for name, p in self.launchers.items()}),
                 }
             )
             return self._authenticate()
@@ -86,6 +143,10 @@ class MinecraftPlugin(Plugin):
                 if "path" in params:
                     raw_path = params["path"][0]
                     new_params = f"?path={urllib.parse.quote(raw_path)}"
+                else:
+                    found = await self._discover_multimc()
+                    if found:
+                        new_params = f"?path={urllib.parse.quote(found[0])}"
                 for game_id in GAMES:
                     if game_id in params and params[game_id][0] == "on":
                         self.owned.append(game_id)
@@ -98,7 +159,7 @@ class MinecraftPlugin(Plugin):
                     if raw_path != "":
                         path = os.path.expanduser(os.path.expandvars(os.path.abspath(raw_path)))
                         try:
-                            self.multimc = multimc.MultiMCClient(path)
+                            self.launchers["multimc"] = multimc.MultiMCClient(path)
                             return misc.get_next_step(
                                 "Finished", 410, 355, "page3", params="?multimc=true"
                             )
@@ -116,6 +177,22 @@ class MinecraftPlugin(Plugin):
 
         log.warning("if you see this, something is wrong")
 
+    async def _discover_multimc(self):
+        import multimc
+
+        discovery = multimc.MultiMCClient.make_discovery(
+            os.path.join(INSTALLED_FOLDER_PATH, "minecraft_multimc_discovery.json")
+        )
+        try:
+            return await discovery.discover(MULTIMC_DISCOVERY_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"MultiMC discovery failed: {e!r}")
+            return []
+        finally:
+            discovery.close()
+
     async def get_owned_games(self):
         log.debug(f"self.owned: {self.owned}")
         out = []
@@ -125,6 +202,7 @@ class MinecraftPlugin(Plugin):
             )
         return out
 
+    @metrics.timed("get_local_games")
     async def get_local_games(self):
         local_games = []
         for game_id in self.owned:
@@ -138,16 +216,26 @@ class MinecraftPlugin(Plugin):
         elif game_id == GameID.MinecraftDungeons:
             return OSCompatibility.Windows
 
+    @metrics.timed("prepare_local_size_context")
+    async def prepare_local_size_context(self, game_ids):
+        roots = {
+            game_id: [await self.local_client.get_launcher_path(game_id, folder=True)]
+            for game_id in game_ids
+        }
+        if GameID.Minecraft in roots:
+            for provider in self.launchers.values():
+                roots[GameID.Minecraft].extend(provider.size_roots())
+        sizes = await self.size_index.get_sizes(roots, timeout=LOCAL_SIZE_TIMEOUT)
+        log.debug(f"Local sizes: {sizes}")
+        return sizes
+
+    @metrics.timed("get_local_size")
     async def get_local_size(self, game_id: str, context):
-        size = await misc.get_size_at_path(
-            self.local_client.find_launcher_path(game_id, folder=True)
-        )
-        if game_id == GameID.Minecraft and self._multimc_enabled():
-            if size is None:
-                size = 0
-            size += await misc.get_size_at_path(self.multimc.folder)
-        return size
+        if context is None:
+            context = await self.prepare_local_size_context([game_id])
+        return context.get(game_id)
 
+    @metrics.timed("install_game")
     async def install_game(self, game_id):
         if game_id == GameID.Minecraft:
             url = MINECRAFT_WIN_INSTALL_URL if IS_WINDOWS else MINECRAFT_MAC_INSTALL_URL
@@ -156,105 +244,240 @@ class MinecraftPlugin(Plugin):
         else:
             log.warning(f"Uknown game_id to install: {game_id}")
             return
-        installer_path = await misc.download(url)
+        installer_path = await misc.download(url, self.installer_cache)
         log.info(f"Installing {game_id} by launching: {installer_path}")
-        misc.open_path(installer_path)
-
-    def _launch_multimc(self):
-        self.multimc.launch()
-
-    def _multimc_enabled(self):
-        return self.multimc is not None
-
-    @double_click_effect(timeout=0.5, effect="_launch_multimc", if_func="_multimc_enabled")
+        process = await misc.open_path(installer_path)
+        self.install_watcher.hurry()
+        self.create_task(self._watch_installer(process), "Installer Watch Task")
+
+    async def _launch_provider(self):
+        provider = next(iter(self.launchers.values()))
+        log.info(f"Launching {provider.name}")
+        await self._watch_process(GameID.Minecraft, await provider.launch())
+
+    def _has_double_click_effect(self, game_id):
+        return game_id == GameID.Minecraft and bool(self.launchers)
+
+    @metrics.timed("launch_game")
+    @double_click_effect(
+        timeout="double_click_window", effect="_launch_provider", if_func="_has_double_click_effect"
+    )
     async def launch_game(self, game_id):
-        pth = self.local_client.find_launcher_path(game_id)
-        if game_id == GameID.Minecraft and pth is None and self._multimc_enabled():
-            log.info("Launching MultiMC")
-            self.multimc.launch()
+        pth = await self.local_client.get_launcher_path(game_id)
+        if game_id == GameID.Minecraft and pth is None and self.launchers:
+            await self._launch_provider()
         else:
-            self.local_client.launch(game_id)
+            await self._watch_process(game_id, await self.local_client.launch(game_id))
 
+    @metrics.timed("uninstall_game")
     async def uninstall_game(self, game_id):
         log.info(f"Uninstalling {game_id}")
-        self.local_client.uninstall(game_id)
+        await self.local_client.uninstall(game_id)
+        self.install_watcher.hurry()
+        await self._update_game(game_id)
+
+    async def _watch_process(self, game_id, process):
+        async def watch():
+            await process.wait()
+            log.info(f"Process of {game_id} exited")
+            await self._update_game(game_id)
+
+        self.process_watcher.hurry()
+        await self._update_game(game_id)
+        self.create_task(watch(), f"Process Watch Task {game_id}")
+
+    async def _watch_installer(self, process):
+        await process.wait()
+        self.install_watcher.hurry()
+        await self._update()
+
+    def _update_status(self, game_id, status: LocalGameState):
+        if self.status[game_id] != status:
+            self.status[game_id] = status
+            self.update_local_game_status(LocalGame(game_id, status))
+            log.info(f"Updated {game_id} to {status}")
+            self.install_watcher.hurry()
+            self.process_watcher.hurry()
+            return True
+        return False
+
+    def _idle(self):
+        return not any(status & LocalGameState.Running for status in self.status.values())
+
+    def _launcher_running(self):
+        return any(
+            provider.running() or name in self.external_processes
+            for name, provider in self.launchers.items()
+        )
 
-    async def _update(self):
-        def update(game_id, status: LocalGameState):
-            if self.status[game_id] != status:
-                self.status[game_id] = status
-                self.update_local_game_status(LocalGame(game_id, status))
-                log.info(f"Updated {game_id} to {status}")
-                return True
-            return False
+    async def _update_game(self, game_id):
+        is_installed = await self.local_client.get_launcher_path(game_id) is not None
+        if game_id == GameID.Minecraft and self._launcher_running():
+            self._update_status(game_id, LocalGameState.Installed | LocalGameState.Running)
+        elif self.local_client.is_game_still_running(game_id) or (
+            game_id in self.external_processes
+        ):
+            if self._update_status(game_id, LocalGameState.Installed | LocalGameState.Running):
+                log.info(f"Starting to track {game_id}")
+                self.game_time_tracker.start_tracking_game(game_id)
+        elif game_id == GameID.Minecraft and self.launchers:
+            self._update_status(game_id, LocalGameState.Installed)
+        elif is_installed:
+            if self._update_status(game_id, LocalGameState.Installed):
+                if game_id in self.game_time_tracker.get_tracking_games():
+                    self.game_time_tracker.stop_tracking_game(game_id)
+                    log.debug(f"Stopped tracking time for {game_id}")
+        else:
+            self._update_status(game_id, LocalGameState.None_)
 
+    @metrics.timed("_update")
+    async def _update(self):
         for game_id in self.owned:
-            is_installed = self.local_client.find_launcher_path(game_id) is not None
-            if game_id == GameID.Minecraft and self._multimc_enabled() and self.multimc.running():
-                update(game_id, LocalGameState.Installed | LocalGameState.Running)
-            elif self.local_client.is_game_still_running(game_id):
-                if update(game_id, LocalGameState.Installed | LocalGameState.Running):
-                    log.info(f"Starting to track {game_id}")
-                    self.game_time_tracker.start_tracking_game(game_id)
-            elif game_id == GameID.Minecraft and self._multimc_enabled():
-                update(game_id, LocalGameState.Installed)
-            elif is_installed:
-                if update(game_id, LocalGameState.Installed):
-                    if game_id in self.game_time_tracker.get_tracking_games():
-                        self.game_time_tracker.stop_tracking_game(game_id)
-                        log.debug(f"Stopped tracking time for {game_id}")
-            else:
-                update(game_id, LocalGameState.None_)
-        await asyncio.sleep(0)
+            await self._update_game(game_id)
+
+    def _find_install_locations(self):
+        with metrics.probe("install_locations"):
+            return tuple(self.local_client.find_launcher_path(game_id) for game_id in self.owned)
+
+    async def _install_probe(self):
+        return await probe_executor.run(self._find_install_locations)
+
+    def _find_processes(self):
+        matchers = {
+            game_id: process_scanner.path_matcher(
+                [self.local_client.find_launcher_path(game_id, folder=True)]
+            )
+            for game_id in self.owned
+        }
+        for name, provider in self.launchers.items():
+            matchers[name] = process_scanner.path_matcher([provider.folder])
+        with metrics.probe("processes"):
+            return frozenset(self.process_scanner.find(matchers))
+
+    async def _process_probe(self):
+        return await probe_executor.run(self._find_processes)
+
+    def _on_processes_change(self, external_processes):
+        log.info(f"Running processes changed: {sorted(external_processes)}")
+        self.external_processes = external_processes
+        self.create_task(self._update(), "Update Task")
 
     def tick(self):
-        if self.update_task is None or self.update_task.done():
+        # Status changes are pushed by the process and install watchers, ticks only start them.
+        if self.update_task is None:
             self.update_task = self.create_task(self._update(), "Update Task")
+            self.install_watcher.start()
+            self.process_watcher.start()
+            self.create_task(self._checkpoint_play_time(), "Play Time Checkpoint Task")
+
+    async def _checkpoint_play_time(self):
+        while True:
+            await asyncio.sleep(time_journal.CHECKPOINT_INTERVAL)
+            self.game_time_tracker.checkpoint()
 
     # Time Tracker
 
-    async def get_game_time(self, game_id, context):
+    def _merge_game_time(self, game_id, *other_times: GameTime):
         try:
             tracked_time = self.game_time_tracker.get_tracked_time(game_id)
         except time_tracker.GameNotTrackedException:
             tracked_time = GameTime(game_id, 0, None)
-        if self._multimc_enabled() and game_id == GameID.Minecraft:
-            multimc_time = self.multimc.get_time()
-        else:
-            multimc_time = GameTime(game_id, 0, None)
-        time = tracked_time.time_played + multimc_time.time_played
-        lastPlayed = misc.compare(tracked_time.last_played_time, multimc_time.last_played_time)
+        time = tracked_time.time_played
+        lastPlayed = tracked_time.last_played_time
+        for other_time in other_times:
+            time += other_time.time_played
+            lastPlayed = misc.compare(lastPlayed, other_time.last_played_time)
         log.debug(f"Got game time: {time}")
         return GameTime(game_id, time, lastPlayed)
 
+    async def _get_minecraft_times(self):
+        """
+        Queries the launcher logs and every launcher provider concurrently, skipping the ones
+        that failed.
+        """
+        names = ["launcher logs", *self.launchers]
+        results = await asyncio.gather(
+            self._get_log_time(),
+            *(self.launchers[name].get_time() for name in names[1:]),
+            return_exceptions=True,
+        )
+        times = []
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                log.warning(f"Could not get the play time of {name}: {result!r}")
+            else:
+                times.append(result)
+        return times
+
+    async def _get_log_time(self):
+        log_minutes, log_last_played = await self.log_time.get_time()
+        return GameTime(GameID.Minecraft, log_minutes, log_last_played)
+
+    @metrics.timed("prepare_game_times_context")
+    async def prepare_game_times_context(self, game_ids):
+        # Launcher instances and logs are scanned once per import rather than per game.
+        minecraft_times = []
+        if GameID.Minecraft in game_ids:
+            minecraft_times = await self._get_minecraft_times()
+        return {
+            game_id: self._merge_game_time(
+                game_id, *(minecraft_times if game_id == GameID.Minecraft else [])
+            )
+            for game_id in game_ids
+        }
+
+    @metrics.timed("get_game_time")
+    async def get_game_time(self, game_id, context):
+        if context is None or game_id not in context:
+            context = await self.prepare_game_times_context([game_id])
+        return context[game_id]
+
     def handshake_complete(self):
         self.play_time_cache_path = os.path.join(
             INSTALLED_FOLDER_PATH, "minecraft_play_time_cache.txt"
         )
         log.debug(f"Local Play Time Cache Path: {self.play_time_cache_path}")
-        if "game_time_cache" in self.persistent_cache:
-            self.game_time_cache = pickle.loads(
-                bytes.fromhex(self.persistent_cache["game_time_cache"])
-            )
-        else:
-            try:
-                with open(self.play_time_cache_path, "r") as file:
-                    for line in file.readlines():
-                        if line[:1] != "#":
-                            self.game_time_cache = pickle.loads(bytes.fromhex(line))
-                            break
-            except FileNotFoundError:
-                self.game_time_cache = None
-        self.game_time_tracker = time_tracker.TimeTracker(game_time_cache=self.game_time_cache)
+        if METRICS_ENABLED:
+            metrics.start(os.path.join(INSTALLED_FOLDER_PATH, "minecraft_metrics.json"))
+        # The local cache file is kept up to date by the journal, so it takes precedence.
+        self.time_journal = time_journal.TimeJournal(
+            self.play_time_cache_path,
+            os.path.join(INSTALLED_FOLDER_PATH, "minecraft_play_time_journal.txt"),
+        )
+        self.game_time_cache = self.time_journal.load()
+        if self.game_time_cache is None:
+            self.game_time_cache = time_cache.load_persistent_cache(self.persistent_cache)
+        self.game_time_tracker = time_tracker.TimeTracker(
+            game_time_cache=self.game_time_cache, journal=self.time_journal
+        )
+        self.game_time_tracker.compact()
+        # Sessions from before the plugin tracked time are only mined from the logs for new
+        # users, the tracked time of existing ones already has those launched through Galaxy.
+        tracked = (self.game_time_cache or {}).get(GameID.Minecraft)
+        self.log_time = log_time.LogTimeSource(
+            os.path.join(MINECRAFT_DIR, "logs"),
+            os.path.join(INSTALLED_FOLDER_PATH, "minecraft_log_time_index.json"),
+            history=not (tracked and tracked["time_played"]),
+        )
+        self.size_index = dirsize.SizeIndex(
+            os.path.join(INSTALLED_FOLDER_PATH, "minecraft_size_index.json")
+        )
+        self.installer_cache = installer_cache.InstallerCache(
+            os.path.join(INSTALLED_FOLDER_PATH, "minecraft_installers"), INSTALLER_CACHE_MAX_SIZE
+        )
 
     async def shutdown(self):
         for game_id in self.game_time_tracker.get_tracking_games():
             self.game_time_tracker.stop_tracking_game(game_id)
-        if self.game_time_cache is not None:
-            with open(self.play_time_cache_path, "w+") as file:
-                file.write("# DO NOT EDIT THIS FILE\n")
-                file.write(self.game_time_tracker.get_time_cache_hex())
-                log.info("Wrote to local file cache")
+        self.game_time_tracker.compact()
+        self.time_journal.close()
+        log.info("Wrote to local file cache")
+        self.install_watcher.stop()
+        self.process_watcher.stop()
+        self.size_index.close()
+        self.local_client.close()
+        probe_executor.close()
+        metrics.stop()
         await super().shutdown()
 
     def game_times_import_complete(self):
@@ -263,8 +486,8 @@ class MinecraftPlugin(Plugin):
         else:
             self.game_time_cache = self.game_time_tracker.get_time_cache()
             log.debug(f"game_time_cache: {self.game_time_cache}")
-            self.persistent_cache["game_time_cache"] = self.game_time_tracker.get_time_cache_hex()
-            self.push_cache()
+            if time_cache.update_persistent_cache(self.persistent_cache, self.game_time_cache):
+                self.push_cache()
 
 
 def main():
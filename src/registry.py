@@ -0,0 +1,154 @@
+import logging, threading
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
+
+from consts import IS_WINDOWS, REGISTRY_START_PATHS
+from utils import probes
+from utils.instrumentation import metrics
+
+if IS_WINDOWS:
+    import winreg
+else:
+    winreg = None
+
+log = logging.getLogger(__name__)
+
+# A program of an Uninstall key, `source` is the (hive, key path) it was read from.
+UninstallEntry = namedtuple(
+    "UninstallEntry",
+    ["display_name", "publisher", "uninstall_string", "install_location", "source"],
+)
+
+
+class RegistryBackend:
+    """
+    Thin wrapper over `winreg` that keeps one connection per hive open instead of connecting on
+    every lookup. Any module exposing the same functions (e.g. a fake `winreg` when running on
+    Linux) can be passed as `module`, together with the `hives` to search.
+    """
+
+    def __init__(self, module=None, hives=None):
+        self._winreg = module if module is not None else winreg
+        self.hives = list(hives) if hives is not None else REGISTRY_START_PATHS
+        self._connections = {}
+        self._lock = threading.Lock()  # lookups run on the probe executor's threads
+
+    def _connect(self, hive):
+        with self._lock:
+            if hive not in self._connections:
+                self._connections[hive] = self._winreg.ConnectRegistry(None, hive)
+            return self._connections[hive]
+
+    def open_key(self, hive, path):
+        with metrics.probe("registry"):
+            return self._winreg.OpenKey(self._connect(hive), path)
+
+    def open_subkey(self, key, name):
+        with metrics.probe("registry"):
+            return self._winreg.OpenKey(key, name)
+
+    def query_value(self, key, name):
+        with metrics.probe("registry"):
+            return self._winreg.QueryValueEx(key, name)[0]
+
+    def last_write_time(self, key) -> int:
+        with metrics.probe("registry"):
+            return self._winreg.QueryInfoKey(key)[2]
+
+    def last_write_time_at(self, hive, path) -> Optional[int]:
+        """Returns the last write time of the key at `path`, or None if it doesn't exist."""
+        try:
+            with self.open_key(hive, path) as key:
+                return self.last_write_time(key)
+        except OSError:
+            return None
+
+    def subkeys(self, key) -> Iterator[str]:
+        for i in range(self._winreg.QueryInfoKey(key)[0]):
+            try:
+                yield self._winreg.EnumKey(key, i)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections.values():
+                self._winreg.CloseKey(connection)
+            self._connections.clear()
+
+
+class UninstallIndex:
+    """
+    Index of the programs in the Uninstall keys at `paths` of every hive of `backend`, by
+    DisplayName. Each key is enumerated once and only again when its last write time changes,
+    which happens when programs are added or removed. Safe to use from several threads.
+    """
+
+    def __init__(self, backend: RegistryBackend, paths: List[str]):
+        self.backend = backend
+        self.paths = paths
+        self._keys = {}  # (hive, path): (last write time, entries)
+        self._by_name: Dict[str, List[UninstallEntry]] = {}
+        self._lock = threading.Lock()
+
+    def _value(self, key, name) -> Optional[str]:
+        try:
+            return self.backend.query_value(key, name)
+        except OSError:
+            return None
+
+    def _read(self, hive, path) -> Optional[List[UninstallEntry]]:
+        """Returns the entries of the key at `path`, or None if the probe was cancelled."""
+        entries = []
+        try:
+            key = self.backend.open_key(hive, path)
+        except OSError:
+            return entries
+        with key:
+            for name in self.backend.subkeys(key):
+                if probes.cancelled():
+                    return None
+                try:
+                    with self.backend.open_subkey(key, name) as subkey:
+                        display_name = self.backend.query_value(subkey, "DisplayName")
+                        entries.append(
+                            UninstallEntry(
+                                display_name,
+                                self._value(subkey, "Publisher"),
+                                self._value(subkey, "UninstallString"),
+                                self._value(subkey, "InstallLocation"),
+                                (hive, path + "\\" + name),
+                            )
+                        )
+                except OSError:
+                    continue
+        return entries
+
+    def refresh(self):
+        changed = False
+        for hive in self.backend.hives:
+            for path in self.paths:
+                last_write_time = self.backend.last_write_time_at(hive, path)
+                cached = self._keys.get((hive, path))
+                if cached is not None and cached[0] == last_write_time:
+                    continue
+                entries = [] if last_write_time is None else self._read(hive, path)
+                if entries is None:
+                    return
+                self._keys[(hive, path)] = (last_write_time, entries)
+                changed = True
+        if changed:
+            self._by_name = {}
+            for _, entries in self._keys.values():
+                for entry in entries:
+                    self._by_name.setdefault(entry.display_name, []).append(entry)
+            log.debug(f"Indexed {sum(map(len, self._by_name.values()))} uninstall entries")
+
+    def find(self, display_name, publisher=None) -> Optional[UninstallEntry]:
+        """Returns the first program named `display_name`, and if given by `publisher`."""
+        with self._lock:
+            self.refresh()
+            for entry in self._by_name.get(display_name, []):
+                if publisher is None or entry.publisher == publisher:
+                    return entry
+        return None
@@ -4,48 +4,63 @@
 import asyncio
 from contextlib import suppress
 from functools import wraps
-from typing import Callable, Union
+from typing import Callable, Dict, Hashable, Union
 
 
 def double_click_effect(
-    timeout: float,
+    timeout: Union[float, str],
     effect: Union[Callable, str],
     if_func: Union[Callable, str] = None,
     *effect_args,
     **effect_kwargs
 ):
     """
-    Decorator of asynchronious function that allows to call synchonious `effect` if
-    the function was called another time within `timeout` seconds and `if_func` is True.
+    Decorator of asynchronious function that allows to call `effect` (synchonious or a
+    coroutine function) if the function was called another time with the same positional
+    arguments within `timeout` seconds and `if_func` is True. `if_func` is called with the
+    arguments of the call; when it is False the function runs right away.
     ---
-    To decorate methods of class instances, `effect` and `if_func` should be str matching
-    the method name.
+    To decorate methods of class instances, `timeout`, `effect` and `if_func` should be str
+    matching the attribute or method name. Pending calls are then kept per instance, as `self`
+    is the first positional argument.
     """
 
+    def _resolve(args, attr):
+        return getattr(args[0], attr) if isinstance(attr, str) else attr
+
     def _wrapper(fn):
+        pending: Dict[Hashable, asyncio.Task] = {}
+
         @wraps(fn)
         async def wrap(*args, **kwargs):
-            async def delayed_fn(s):
-                await asyncio.sleep(s)
-                await fn(*args, **kwargs)
-
             if if_func is not None:
-                if_func_new = getattr(args[0], if_func) if isinstance(if_func, str) else if_func
-                timeout_new = 0 if not if_func_new() else timeout
-            else:
-                timeout_new = timeout
-            if wrap.task is None or wrap.task.done() or wrap.task.cancelled():
-                wrap.task = asyncio.create_task(delayed_fn(timeout_new))
+                if_func_new = _resolve(args, if_func)
+                call_args = args[1:] if isinstance(if_func, str) else args
+                if not if_func_new(*call_args, **kwargs):
+                    return await fn(*args, **kwargs)
+
+            task = pending.get(args)
+            if task is None or task.done():
+
+                async def delayed_fn():
+                    try:
+                        await asyncio.sleep(_resolve(args, timeout))
+                    finally:
+                        # The window is over, from here on the call can't be cancelled.
+                        pending.pop(args, None)
+                    await fn(*args, **kwargs)
+
+                task = pending[args] = asyncio.ensure_future(delayed_fn())
                 with suppress(asyncio.CancelledError):
-                    await wrap.task
+                    await task
             else:
-                wrap.task.cancel()
-                if isinstance(effect, str):  # for class methods args[0] is `self`
-                    return getattr(args[0], effect)(*effect_args, **effect_kwargs)
-                else:
-                    return effect(*effect_args, **effect_kwargs)
+                task.cancel()
+                pending.pop(args, None)
+                result = _resolve(args, effect)(*effect_args, **effect_kwargs)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                return result
 
-        wrap.task = None
         return wrap
 
     return _wrapper
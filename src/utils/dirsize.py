@@ -0,0 +1,278 @@
+import os, asyncio, logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from utils import misc
+from utils.instrumentation import metrics
+
+log = logging.getLogger(__name__)
+
+MAX_WORKERS = 4
+
+# `size` is the sum of the regular files directly inside the directory, `subdirs` the paths of
+# its (non symlinked) child directories and `mtime` the directory's st_mtime_ns.
+DirRecord = namedtuple("DirRecord", ["mtime", "size", "subdirs"])
+
+
+def scan_dir(path) -> Optional[DirRecord]:
+    """
+    Lists a single directory with `os.scandir`, reusing the `DirEntry` stat results so each file
+    costs at most one syscall (none on Windows). Returns None if the directory can't be read.
+    """
+    with metrics.probe("filesystem.scan_dir"):
+        return _scan_dir(path)
+
+
+def _scan_dir(path) -> Optional[DirRecord]:
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        size = 0
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except OSError as e:
+        log.debug(f"Could not scan {path}: {e}")
+        return None
+    return DirRecord(mtime, size, subdirs)
+
+
+def rescan_dir(path, previous: Optional[DirRecord]) -> Optional[DirRecord]:
+    """
+    Reuses `previous` if the directory's mtime hasn't changed since it was recorded. A directory's
+    mtime only changes when entries are added, removed or renamed in it, so files rewritten in
+    place are picked up on the next change to their directory.
+    """
+    if previous is not None:
+        try:
+            if os.stat(path).st_mtime_ns == previous.mtime:
+                return previous
+        except OSError:
+            return None
+    return scan_dir(path)
+
+
+def total_size(records: Dict[str, DirRecord], root) -> int:
+    total = 0
+    stack = [root]
+    while stack:
+        record = records.get(stack.pop())
+        if record is not None:
+            total += record.size
+            stack.extend(record.subdirs)
+    return total
+
+
+def subtree_sizes(records: Dict[str, DirRecord], root) -> Dict[str, int]:
+    record = records.get(root)
+    if record is None:
+        return {}
+    return {path: total_size(records, path) for path in record.subdirs}
+
+
+def outermost(paths: Iterable[str]) -> List[str]:
+    """Normalizes `paths` and drops duplicates and any path nested inside another one."""
+    roots = []
+    # Sorted by components, so paths nested in a root directly follow it: as strings, siblings
+    # like "a b" or "a-old" would sort between "a" and "a/x".
+    for path in sorted({os.path.normpath(p) for p in paths}, key=lambda p: p.split(os.sep)):
+        if not roots or not path.startswith(os.path.join(roots[-1], "")):
+            roots.append(path)
+    return roots
+
+
+class SizeEngine:
+    """
+    Walks directory trees by fanning every directory out as its own job on a bounded thread pool.
+    Walks can be cancelled or given a timeout; jobs that haven't started yet are dropped.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dirsize")
+
+    async def walk(
+        self, root, *, timeout: float = None, previous: Dict[str, DirRecord] = None
+    ) -> Dict[str, DirRecord]:
+        """
+        Returns the records of every directory under `root`. Directories found in `previous` with
+        an unchanged mtime are not listed again.
+        """
+        if timeout is None:
+            return await self._walk(root, previous or {})
+        return await asyncio.wait_for(self._walk(root, previous or {}), timeout)
+
+    def _submit(self, path, previous):
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, rescan_dir, path, previous.get(path)
+        )
+
+    async def _walk(self, root, previous) -> Dict[str, DirRecord]:
+        records = {}
+        queue = [root]
+        jobs = {}
+        try:
+            while queue or jobs:
+                # Keep the pool busy without queueing the whole tree as futures up front.
+                while queue and len(jobs) < self._max_workers * 2:
+                    path = queue.pop()
+                    jobs[self._submit(path, previous)] = path
+                done, _ = await asyncio.wait(jobs, return_when=asyncio.FIRST_COMPLETED)
+                for job in done:
+                    path = jobs.pop(job)
+                    record = job.result()
+                    if record is not None:
+                        records[path] = record
+                        queue.extend(record.subdirs)
+        finally:
+            for job in jobs:
+                job.cancel()
+        return records
+
+    async def get_size(self, root, *, subtrees=False, timeout: float = None):
+        """
+        Returns the total size in bytes of `root`. With `subtrees` a tuple of the total and a dict
+        of the totals of each of the root's child directories is returned instead.
+        """
+        records = await self.walk(root, timeout=timeout)
+        total = total_size(records, root)
+        if subtrees:
+            return total, subtree_sizes(records, root)
+        return total
+
+
+_engine = SizeEngine()
+
+
+class SizeIndex:
+    """
+    Persistent per-directory size index stored as JSON at `path`. Once a root has been walked its
+    last known total is returned straight away while a background walk revalidates it, only
+    listing the directories whose mtime changed.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, engine: SizeEngine = None):
+        self.path = path
+        self._engine = engine or _engine
+        self._records: Dict[str, DirRecord] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        self._save_lock: asyncio.Lock = None
+        self._load()
+
+    def _load(self):
+        data = misc.read_versioned_json(self.path, self.VERSION, "size index")
+        if data is None:
+            return
+        for path, (mtime, size, subdirs) in data["records"].items():
+            self._records[path] = DirRecord(
+                mtime, size, [os.path.join(path, name) for name in subdirs]
+            )
+        log.debug(f"Loaded {len(self._records)} directories from size index")
+
+    def _dump(self, records: Dict[str, DirRecord]):
+        data = {
+            "version": self.VERSION,
+            "records": {
+                path: [r.mtime, r.size, [os.path.basename(d) for d in r.subdirs]]
+                for path, r in records.items()
+            },
+        }
+        misc.write_json(self.path, data, separators=(",", ":"))
+
+    async def save(self):
+        # Refreshes of different roots finish concurrently and would race on the temporary file.
+        # Created here, on 3.7 locks bind to the current event loop when created.
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        try:
+            async with self._save_lock:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._dump, dict(self._records)
+                )
+        except OSError as e:
+            log.warning(f"Could not save size index {self.path}: {e}")
+
+    def total(self, root) -> Optional[int]:
+        root = os.path.normpath(root)
+        if root not in self._records:
+            return None
+        return total_size(self._records, root)
+
+    async def refresh(self, root, *, timeout: float = None) -> int:
+        root = os.path.normpath(root)
+        records = await self._engine.walk(root, timeout=timeout, previous=self._records)
+        prefix = os.path.join(root, "")
+        for path in [p for p in self._records if p == root or p.startswith(prefix)]:
+            if path not in records:
+                del self._records[path]
+        self._records.update(records)
+        await self.save()
+        return total_size(records, root)
+
+    def _refresh_task(self, root, timeout) -> asyncio.Task:
+        task = self._refresh_tasks.get(root)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self.refresh(root, timeout=timeout))
+            task.add_done_callback(self._log_refresh_failure)
+            self._refresh_tasks[root] = task
+        return task
+
+    @staticmethod
+    def _log_refresh_failure(task):
+        if task.cancelled():
+            return
+        if isinstance(task.exception(), asyncio.TimeoutError):
+            log.warning("Timed out refreshing size index")
+        elif task.exception() is not None:
+            log.error(f"Failed refreshing size index: {task.exception()!r}")
+
+    async def get_size(self, root, *, timeout: float = None) -> int:
+        """
+        Returns the last known size of `root` and schedules a refresh of it, or walks it if it
+        isn't indexed yet. Concurrent calls for the same root share one walk.
+        """
+        root = os.path.normpath(root)
+        task = self._refresh_task(root, timeout)
+        if root in self._records:
+            return total_size(self._records, root)
+        return await asyncio.shield(task)
+
+    async def get_sizes(
+        self, roots: Dict[str, List[str]], *, timeout: float = None
+    ) -> Dict[str, Optional[int]]:
+        """
+        Sizes several groups of roots in one concurrent pass. Each key maps to the combined size
+        of its roots (None if none of them could be sized); overlapping or nested roots, within a
+        group or across groups, are only walked once.
+        """
+        roots = {key: outermost(p for p in paths if p is not None) for key, paths in roots.items()}
+        to_walk = outermost(path for paths in roots.values() for path in paths)
+        results = await asyncio.gather(
+            *(self.get_size(root, timeout=timeout) for root in to_walk), return_exceptions=True
+        )
+        for root, result in zip(to_walk, results):
+            if isinstance(result, Exception):
+                log.warning(f"Could not get size of {root}: {result!r}")
+        sizes = {}
+        for key, paths in roots.items():
+            totals = [self.total(path) for path in paths]
+            totals = [total for total in totals if total is not None]
+            sizes[key] = sum(totals) if totals else None
+        return sizes
+
+    def close(self):
+        for task in self._refresh_tasks.values():
+            task.cancel()
+
+
+async def get_size_at_path(start_path, *, subtrees=False, timeout: float = None):
+    return await _engine.get_size(start_path, subtrees=subtrees, timeout=timeout)
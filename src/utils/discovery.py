@@ -0,0 +1,179 @@
+import os, time, asyncio, logging
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from utils import misc, probes
+from utils.probes import ProbeExecutor
+
+log = logging.getLogger(__name__)
+
+DISCOVERY_WORKERS = 4
+MAX_DEPTH = 4
+
+# Folders that never contain user installed programs, or only far too many files to search.
+PRUNED = {
+    "$recycle.bin",
+    "system volume information",
+    "windows",
+    "programdata",
+    "appdata",
+    "library",
+    "system",
+    "node_modules",
+    "site-packages",
+    "__pycache__",
+    "venv",
+    "instances",
+}
+
+# Called with a folder and one of its entries, returns the installation the entry is, or None.
+Matcher = Callable[[str, os.DirEntry], Optional[str]]
+
+
+def _pruned(entry: os.DirEntry) -> bool:
+    name = entry.name.lower()
+    return name.startswith((".", "$")) or name in PRUNED or name.endswith(".app")
+
+
+def search(
+    root: str, match: Matcher, *, max_depth: int = MAX_DEPTH, deadline: float, visited: set
+) -> List[str]:
+    """
+    Breadth first search of `root` for installations, so likely shallow locations are searched
+    first. Stops at the first folder containing a match, `max_depth` levels down, at the
+    `time.monotonic()` `deadline` or when the probe is cancelled. Folders in `visited`, which is
+    shared by the searches of overlapping roots, are skipped.
+    """
+    found = []
+    queue = deque([(root, 0)])
+    while queue and not found:
+        folder, depth = queue.popleft()
+        key = os.path.normcase(os.path.abspath(folder))
+        if key in visited:
+            continue
+        visited.add(key)
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if probes.cancelled() or time.monotonic() > deadline:
+                return found
+            try:
+                installation = match(folder, entry)
+                if installation is not None:
+                    found.append(installation)
+                elif (
+                    depth < max_depth and entry.is_dir(follow_symlinks=False) and not _pruned(entry)
+                ):
+                    queue.append((entry.path, depth + 1))
+            except OSError:
+                continue
+    return found
+
+
+def _first_match(tasks: List[asyncio.Future], *, finished: bool = False) -> Optional[List[str]]:
+    """
+    The installations found by the first of the searches `tasks` with any, in order, or None if
+    one before it is still running. With `finished` the running ones are skipped instead.
+    """
+    for task in tasks:
+        if not task.done():
+            if finished:
+                continue
+            return None
+        if not task.cancelled() and task.exception() is None and task.result():
+            return task.result()
+    return None
+
+
+class Discovery:
+    """
+    Searches `roots`, a list of (folder, max depth) in order of likelihood, in parallel for
+    installations recognized by `match` and caches those of the likeliest root with any in
+    `cache_path`. Cached installations that `is_valid` still accepts are returned without
+    searching.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        roots: Callable[[], Iterable[Tuple[str, int]]],
+        match: Matcher,
+        is_valid: Callable[[str], bool],
+        cache_path: str,
+        *,
+        max_workers: int = DISCOVERY_WORKERS,
+    ):
+        self._roots = roots
+        self._match = match
+        self._is_valid = is_valid
+        self.cache_path = cache_path
+        self._executor = ProbeExecutor(max_workers)
+
+    def _load(self) -> List[str]:
+        cache = misc.read_versioned_json(self.cache_path, self.VERSION, "discovery cache")
+        return [] if cache is None else [path for path in cache["found"] if self._is_valid(path)]
+
+    def _save(self, found: List[str]):
+        misc.write_json(self.cache_path, {"version": self.VERSION, "found": found})
+
+    async def _search(self, timeout: float) -> List[str]:
+        deadline = time.monotonic() + timeout
+        visited = set()
+        # One probe per root, which also finds out whether it exists: a disconnected network
+        # drive can block that for long, and then only holds up its own root.
+        tasks = [
+            asyncio.ensure_future(
+                # The searches return by themselves at the deadline, the timeout is a safeguard.
+                self._executor.run(
+                    search,
+                    root,
+                    self._match,
+                    max_depth=depth,
+                    deadline=deadline,
+                    visited=visited,
+                    timeout=timeout + 1,
+                )
+            )
+            for root, depth in self._roots()
+        ]
+        pending = set(tasks)
+        try:
+            # Waits for the likeliest root with a match, the others are told through
+            # `cancelled()`. At the deadline the likeliest of the finished ones is used.
+            while pending and time.monotonic() < deadline:
+                found = _first_match(tasks)
+                if found is not None:
+                    return found
+                _, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline - time.monotonic(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            return _first_match(tasks, finished=True) or []
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def discover(self, timeout: float) -> List[str]:
+        """Returns the installations found within about `timeout` seconds, the likeliest first."""
+        loop = asyncio.get_running_loop()
+        found = await loop.run_in_executor(None, self._load)
+        if found:
+            log.debug(f"Cached installations: {found}")
+            return found
+        start = time.monotonic()
+        found = await self._search(timeout)
+        log.info(f"Discovered {found} in {time.monotonic() - start:.2f}s")
+        if found:
+            try:
+                await loop.run_in_executor(None, self._save, found)
+            except OSError as e:
+                log.warning(f"Could not save the discovery cache: {e}")
+        return found
+
+    def close(self):
+        self._executor.close()
@@ -0,0 +1,312 @@
+import os, re, asyncio, logging, hashlib
+from typing import Callable, Mapping, Optional, Tuple
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024  # in bytes
+SEGMENTS = 4
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024  # in bytes
+RETRIES = 3
+TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+RESUMABLE_ERRORS = (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+# Called with the number of bytes downloaded so far and the total size, if known.
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(Exception):
+    pass
+
+
+class NotModified(Exception):
+    """Raised when a conditional request finds the resource unchanged."""
+
+
+def _content_range(response: aiohttp.ClientResponse) -> Optional[Tuple[int, int, Optional[int]]]:
+    """The first byte, the end (exclusive) and the total size, if known, of a 206 response."""
+    match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", response.headers.get("Content-Range", ""))
+    if match is None:
+        return None
+    total = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)) + 1, total
+
+
+def _total_size(response: aiohttp.ClientResponse, offset: int) -> Optional[int]:
+    content_range = _content_range(response)
+    if content_range is not None:
+        return content_range[2]
+    if response.content_length is not None:
+        return offset + response.content_length
+    return None
+
+
+def _validator(headers: Mapping) -> Optional[str]:
+    """The strong ETag or the Last-Modified date of a response, usable in If-Range."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _read_validator(part_path) -> Optional[str]:
+    try:
+        with open(part_path + ".validator", "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_validator(part_path, headers: Mapping):
+    """Keeps the validator of the response being written to `part_path` for resuming it."""
+    validator = _validator(headers)
+    if validator is None:
+        _remove(part_path + ".validator")
+        return
+    with open(part_path + ".validator", "w") as f:
+        f.write(validator)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def file_sha256(path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def _write_segment(session, url, path, start, end, done, progress, retries, response=None):
+    """
+    Writes bytes `start` to `end` (exclusive) of `url` at their offset in the preallocated
+    `path`, reading them from `response` if given, else with a Range request. An interrupted
+    segment is resumed on its own.
+    """
+    offset = start
+    for attempt in range(retries + 1):
+        try:
+            if response is None:
+                response = await session.get(url, headers={"Range": f"bytes={offset}-{end - 1}"})
+                if response.status != 206:
+                    response.release()
+                    raise DownloadError(f"Server ignored range request for {url}")
+            try:
+                with open(path, "r+b") as f:
+                    f.seek(offset)
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        chunk = chunk[: end - offset]
+                        f.write(chunk)
+                        offset += len(chunk)
+                        done[0] += len(chunk)
+                        if progress is not None:
+                            progress(done[0], done[1])
+                        if offset >= end:
+                            break
+            finally:
+                response.release()
+            if offset < end:
+                raise aiohttp.ClientPayloadError(f"Segment ended at {offset} of {end}")
+            return
+        except RESUMABLE_ERRORS as e:
+            response = None
+            if attempt == retries:
+                raise DownloadError(f"Failed downloading {url} at {offset}: {e!r}") from e
+            log.warning(f"Segment of {url} interrupted at {offset} ({e!r}), resuming")
+
+
+async def _fetch_segments(
+    session, url, part_path, response, first_end, total, segments, progress, retries
+):
+    """
+    Downloads `url` in up to `segments` concurrent byte ranges into `part_path`, preallocated to
+    `total` bytes. The first segment, bytes 0 to `first_end`, is read from `response`, the
+    ranged request that reported the size, the rest is split in ranges of at least
+    `MIN_SEGMENT_SIZE` bytes.
+    """
+    rest = total - first_end
+    count = max(min(segments - 1, rest // MIN_SEGMENT_SIZE), 1)
+    size = -(-rest // count)
+    bounds = [(0, first_end)]
+    bounds += [(start, min(start + size, total)) for start in range(first_end, total, size)]
+    log.debug(f"Downloading {url} in {len(bounds)} segments")
+    with open(part_path, "wb") as f:
+        f.truncate(total)
+    done = [0, total]
+    tasks = [
+        asyncio.ensure_future(
+            _write_segment(
+                session,
+                url,
+                part_path,
+                start,
+                end,
+                done,
+                progress,
+                retries,
+                response if start == 0 else None,
+            )
+        )
+        for start, end in bounds
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # The file has holes, it can't be resumed from its size.
+        os.remove(part_path)
+        _remove(part_path + ".validator")
+        raise
+
+
+async def _fetch(
+    session, url, part_path, progress, headers, segments=1, retries=RETRIES
+) -> Tuple[Optional[int], Mapping]:
+    """
+    Appends the rest of `url` to `part_path`, resuming with a Range request if it exists, and
+    returns the total size and the response headers. Resumed requests carry the validator of
+    the response `part_path` was started from in If-Range, so a changed file is downloaded from
+    the start rather than spliced. With `segments` above 1 fresh downloads only request their
+    first `MIN_SEGMENT_SIZE` bytes at first, and if the server answers with a range the rest is
+    split in concurrent ones.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = _read_validator(part_path) if offset else None
+    if offset and validator is None:
+        log.debug(f"Partial download of {url} has no validator, restarting")
+        offset = 0
+    # Conditional headers only apply to fresh downloads, a resumed one is already known changed.
+    if offset:
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+    else:
+        headers = dict(headers or {})
+        if segments > 1:
+            headers["Range"] = f"bytes=0-{MIN_SEGMENT_SIZE - 1}"
+    async with session.get(url, headers=headers) as response:
+        if offset and response.status == 416:
+            log.debug(f"Partial download of {url} is not resumable, restarting")
+            os.remove(part_path)
+            _remove(part_path + ".validator")
+            return await _fetch(session, url, part_path, progress, None, segments, retries)
+        if response.status == 304:
+            raise NotModified(url)
+        response.raise_for_status()
+        if offset and response.status != 206:
+            log.debug(f"{url} changed or the server ignored the range request, restarting")
+            offset = 0
+        if not offset:
+            _write_validator(part_path, response.headers)
+        total = _total_size(response, offset)
+        # A fresh download answered with its first segment only.
+        first_range = _content_range(response) if not offset and response.status == 206 else None
+        if first_range is not None and total is not None and first_range[1] < total:
+            await _fetch_segments(
+                session,
+                url,
+                part_path,
+                response,
+                first_range[1],
+                total,
+                segments,
+                progress,
+                retries,
+            )
+            return total, response.headers
+        with open(part_path, "ab" if offset else "wb") as f:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                f.write(chunk)
+                offset += len(chunk)
+                if progress is not None:
+                    progress(offset, total)
+        response_headers = response.headers
+    if first_range is not None and total is None:
+        # Servers not reporting the size get the rest in one request, as a resumed download.
+        return await _fetch(session, url, part_path, progress, None, 1, retries)
+    return total, response_headers
+
+
+async def download(
+    url,
+    path,
+    *,
+    session: aiohttp.ClientSession = None,
+    sha256: str = None,
+    progress: ProgressCallback = None,
+    retries: int = RETRIES,
+    headers: Mapping[str, str] = None,
+    segments: int = SEGMENTS,
+) -> str:
+    """
+    Streams `url` to `path` through a `.part` file that is renamed once complete, so memory use
+    doesn't depend on the file size and `path` never holds a partial download. Dropped
+    connections are resumed with Range requests. The size is checked against the one reported
+    by the server and, if given, the content against `sha256`. Large files of servers accepting
+    ranges are fetched in up to `segments` concurrent ranges, each retried on its own.
+    """
+    path, _ = await download_with_headers(
+        url,
+        path,
+        session=session,
+        sha256=sha256,
+        progress=progress,
+        retries=retries,
+        headers=headers,
+        segments=segments,
+    )
+    return path
+
+
+async def download_with_headers(
+    url,
+    path,
+    *,
+    session: aiohttp.ClientSession = None,
+    sha256: str = None,
+    progress: ProgressCallback = None,
+    retries: int = RETRIES,
+    headers: Mapping[str, str] = None,
+    segments: int = SEGMENTS,
+) -> Tuple[str, Mapping]:
+    """
+    Like `download`, also returning the response headers. Raises `NotModified` if `headers` hold
+    conditional request headers (If-None-Match, If-Modified-Since) and the server answers 304.
+    """
+    part_path = path + ".part"
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(timeout=TIMEOUT)
+    try:
+        for attempt in range(retries + 1):
+            try:
+                total, response_headers = await _fetch(
+                    session, url, part_path, progress, headers, segments, retries
+                )
+                break
+            except RESUMABLE_ERRORS as e:
+                if attempt == retries:
+                    raise DownloadError(f"Failed downloading {url}: {e!r}") from e
+                log.warning(f"Download of {url} interrupted ({e!r}), resuming")
+    finally:
+        if own_session:
+            await session.close()
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise DownloadError(f"Downloaded {size} bytes of {url}, expected {total}")
+    if sha256 is not None:
+        digest = await asyncio.get_running_loop().run_in_executor(None, file_sha256, part_path)
+        if digest != sha256.lower():
+            os.remove(part_path)
+            _remove(part_path + ".validator")
+            raise DownloadError(f"Checksum mismatch for {url}: {digest}")
+    os.replace(part_path, path)
+    _remove(part_path + ".validator")
+    return path, response_headers
@@ -0,0 +1,141 @@
+import os, time, shutil, asyncio, hashlib, logging
+from typing import Dict, Optional
+
+from utils import misc
+
+log = logging.getLogger(__name__)
+
+
+class InstallerCache:
+    """
+    Downloaded installers kept in `path`, content addressed as `<sha256>/<file name>` so URLs
+    serving the same file share it and it keeps its name (and extension) for launching. An index
+    maps each URL to its file and its ETag and Last-Modified validators, with which cached files
+    are revalidated by conditional requests; they are only downloaded again when the server
+    reports a change. Least recently used files are evicted once the cache exceeds `max_size`.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.index_path = os.path.join(path, "index.json")
+        self._entries: Dict[str, Dict] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        index = misc.read_versioned_json(self.index_path, self.VERSION, "installer cache index")
+        return {} if index is None else index["entries"]
+
+    def _save(self):
+        misc.write_json(
+            self.index_path, {"version": self.VERSION, "entries": self._entries}, indent=1
+        )
+
+    def _file(self, entry) -> str:
+        return os.path.join(self.path, entry["sha256"], entry["name"])
+
+    def cached(self, url) -> Optional[str]:
+        """Returns the cached file of `url` without revalidating it, or None."""
+        if self._entries is None:
+            self._entries = self._load()
+        entry = self._entries.get(url)
+        if entry is None or not os.path.exists(self._file(entry)):
+            return None
+        return self._file(entry)
+
+    @staticmethod
+    def _conditional_headers(entry) -> Dict[str, str]:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _store(self, url, name, download_path, sha256, response_headers) -> str:
+        """Moves a finished download to its content address and indexes it under `url`."""
+        entry = {
+            "sha256": sha256,
+            "name": name,
+            "size": os.path.getsize(download_path),
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "used": time.time(),
+        }
+        os.makedirs(os.path.join(self.path, entry["sha256"]), exist_ok=True)
+        os.replace(download_path, self._file(entry))
+        replaced = self._entries.get(url)
+        self._entries[url] = entry
+        if replaced is not None and not self._referenced(replaced["sha256"]):
+            log.debug(f"Removing the previous installer of {url}")
+            shutil.rmtree(os.path.join(self.path, replaced["sha256"]), ignore_errors=True)
+        return self._file(entry)
+
+    def _referenced(self, sha256) -> bool:
+        return any(entry["sha256"] == sha256 for entry in self._entries.values())
+
+    def _evict(self, keep: str):
+        """Removes least recently used files until the cache fits, never the one of `keep`."""
+        files = {}  # sha256: (last used, size)
+        for entry in self._entries.values():
+            used, _ = files.get(entry["sha256"], (0, 0))
+            files[entry["sha256"]] = (max(used, entry["used"]), entry["size"])
+        # Files no longer indexed, e.g. left by an interrupted update, count for nothing.
+        for name in os.listdir(self.path):
+            if (
+                len(name) == 64
+                and name not in files
+                and os.path.isdir(os.path.join(self.path, name))
+            ):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        total = sum(size for _, size in files.values())
+        for sha256, (_, size) in sorted(files.items(), key=lambda item: item[1][0]):
+            if total <= self.max_size:
+                break
+            if sha256 == self._entries[keep]["sha256"]:
+                continue
+            log.debug(f"Evicting installer {sha256} from the cache")
+            shutil.rmtree(os.path.join(self.path, sha256), ignore_errors=True)
+            self._entries = {u: e for u, e in self._entries.items() if e["sha256"] != sha256}
+            total -= size
+
+    async def get(self, url, *, progress=None) -> str:
+        """Returns the path of the installer at `url`, downloading it only if it changed."""
+        # Imported here as aiohttp's client is the slowest import of the plugin.
+        import aiohttp
+        from utils import downloader
+
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            cached = self.cached(url)
+            os.makedirs(self.path, exist_ok=True)
+            name = url.split("/")[-1].split("?")[0] or "installer"
+            download_path = os.path.join(
+                self.path, hashlib.sha1(url.encode()).hexdigest()[:16] + "-" + name
+            )
+            headers = self._conditional_headers(self._entries[url]) if cached else None
+            loop = asyncio.get_running_loop()
+            try:
+                _, response_headers = await downloader.download_with_headers(
+                    url, download_path, progress=progress, headers=headers
+                )
+            except downloader.NotModified:
+                log.info(f"Cached installer of {url} is up to date")
+                path = cached
+            except (downloader.DownloadError, aiohttp.ClientError) as e:
+                if cached is None:
+                    raise
+                log.warning(f"Could not revalidate {url}, using the cached installer: {e}")
+                path = cached
+            else:
+                sha256 = await loop.run_in_executor(None, downloader.file_sha256, download_path)
+                path = self._store(url, name, download_path, sha256, response_headers)
+            self._entries[url]["used"] = time.time()
+            try:
+                self._evict(keep=url)
+                await loop.run_in_executor(None, self._save)
+            except OSError as e:
+                log.warning(f"Could not update the installer cache: {e}")
+            return path
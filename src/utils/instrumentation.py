@@ -0,0 +1,137 @@
+import time, asyncio, bisect, logging, threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from utils import misc
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = 60  # in seconds
+LAG_INTERVAL = 1  # in seconds
+_DISABLED = nullcontext()
+BUCKETS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10]  # upper bounds
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": {
+                f"<={bound}" if i < len(BUCKETS) else f">{BUCKETS[-1]}": count
+                for i, (bound, count) in enumerate(zip(BUCKETS + [None], self.buckets))
+                if count
+            },
+        }
+
+
+class Instrumentation:
+    """
+    Latency histograms of plugin handlers (`timed`), of blocking filesystem and registry probes
+    (`probe`, safe to use from executor threads) and of event loop lag, periodically written as
+    JSON to `path`. While disabled a hook only costs checking `enabled`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._tasks = []
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            self._histograms[name].add(seconds)
+
+    def timed(self, name):
+        """Decorator recording the duration of every call of a coroutine function as `name`."""
+
+        def _wrapper(fn):
+            @wraps(fn)
+            async def wrap(*args, **kwargs):
+                if not self.enabled:
+                    return await fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrap
+
+        return _wrapper
+
+    def probe(self, name):
+        """Context manager recording the time spent in a blocking probe as `probe.<name>`."""
+        if not self.enabled:
+            return _DISABLED
+        return self._probe(name)
+
+    @contextmanager
+    def _probe(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(f"probe.{name}", time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": time.time(),
+                "metrics": {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+            }
+
+    def write_snapshot(self):
+        misc.write_json(self.path, self.snapshot(), indent=1)
+
+    async def _measure_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.record("loop_lag", max(loop.time() - expected, 0))
+
+    async def _write_snapshots(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                log.warning(f"Could not write metrics to {self.path}: {e}")
+
+    def start(self, path):
+        """Enables recording and starts the loop lag monitor and snapshot writer."""
+        self.enabled = True
+        self.path = path
+        self._tasks = [
+            asyncio.ensure_future(self._measure_lag()),
+            asyncio.ensure_future(self._write_snapshots()),
+        ]
+        log.info(f"Writing metrics to {path}")
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.enabled:
+            self.write_snapshot()
+            self.enabled = False
+
+
+metrics = Instrumentation()
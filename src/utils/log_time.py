@@ -0,0 +1,170 @@
+import os, re, gzip, time, asyncio, hashlib, logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from utils import misc
+
+log = logging.getLogger(__name__)
+
+# Every launch of the game writes a new latest.log, which is gzipped to YYYY-MM-DD-N.log.gz
+# (named after its modification date) on the next launch. Lines start with [HH:MM:SS].
+TIMESTAMP_RE = re.compile(rb"^\[(\d{2}):(\d{2}):(\d{2})")
+ARCHIVE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-\d+\.log(\.gz)?$")
+HEAD_SIZE = 512  # bytes identifying a session across the latest.log -> .log.gz rotation
+DAY = 24 * 60 * 60
+
+
+def _open(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _head_key(path) -> Optional[str]:
+    with _open(path) as f:
+        head = f.read(HEAD_SIZE)
+    return hashlib.sha1(head).hexdigest() if head else None
+
+
+def read_session(path, state: Dict = None) -> Dict:
+    """
+    Streams a log line by line from where `state` (the result of a previous call for the same
+    file) left off and returns the updated state: the offset read up to, the last timestamp seen
+    as seconds since midnight and the `elapsed` seconds since the first one, counting a day for
+    every wrap past midnight.
+    """
+    state = dict(state or {"offset": 0, "last": None, "elapsed": 0})
+    with _open(path) as f:
+        f.seek(state["offset"])
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # still being written, read it next time
+            state["offset"] += len(line)
+            match = TIMESTAMP_RE.match(line)
+            if match is None:
+                continue
+            hours, minutes, seconds = (int(x) for x in match.groups())
+            timestamp = hours * 3600 + minutes * 60 + seconds
+            if state["last"] is not None:
+                state["elapsed"] += (timestamp - state["last"]) % DAY
+            state["last"] = timestamp
+    return state
+
+
+class LogTimeSource:
+    """
+    Play time mined from the vanilla game's logs in `logs_path`, with a persistent index at
+    `index_path` of how far every file has been read so each refresh only reads new data.
+    Only sessions that ended before the index was created are counted, later ones are tracked
+    by the plugin itself. A session still running then is counted as it was when first seen
+    ending before it, so its later play time isn't counted twice nor the total lowered.
+
+    With `history` False, when the plugin already tracked play time before the index was
+    created, no session is counted: the tracked time includes the sessions launched through
+    Galaxy and the logs can't tell them apart from the others.
+    """
+
+    VERSION = 1
+
+    def __init__(self, logs_path, index_path, *, history: bool = True):
+        self.logs_path = logs_path
+        self.index_path = index_path
+        self._index = self._load(history)
+        self._dirty = not os.path.exists(self.index_path)
+
+    def _load(self, history: bool) -> Dict:
+        index = misc.read_versioned_json(self.index_path, self.VERSION, "log time index")
+        # Decided once, when the index is created: no session ends before 0.
+        since = time.time() if history else 0
+        return index or {"version": self.VERSION, "since": since, "files": {}}
+
+    def _save(self):
+        misc.write_json(self.index_path, self._index, separators=(",", ":"))
+
+    @staticmethod
+    def _session_end(name, state, mtime) -> Optional[float]:
+        if state["last"] is None:
+            return None
+        match = ARCHIVE_RE.match(name)
+        if match is not None:
+            day = datetime.strptime(match.group(1), "%Y-%m-%d")
+        else:
+            day = datetime.fromtimestamp(mtime).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (day + timedelta(seconds=state["last"])).timestamp()
+
+    def _refresh_file(self, entry: Optional[Dict], path, stat) -> Optional[Dict]:
+        signature = [stat.st_size, stat.st_mtime_ns]
+        if entry is not None and entry["signature"] == signature:
+            return entry
+        key = _head_key(path)
+        if key is None:
+            return None
+        if entry is not None and entry["key"] == key and not path.endswith(".gz"):
+            entry = dict(entry)
+        else:
+            # A new session (latest.log is rewritten on every launch) or a rotated archive,
+            # which is only read once as its signature never changes afterwards.
+            entry = {"key": key, "state": None}
+        entry["state"] = read_session(path, entry["state"])
+        entry["signature"] = signature
+        entry["end"] = self._session_end(os.path.basename(path), entry["state"], stat.st_mtime)
+        return entry
+
+    def _counted(self, entry: Dict, counted: Dict[str, list]) -> Optional[list]:
+        """The [elapsed seconds, end] of `entry` counted in the play time, if any."""
+        if entry["end"] is not None and entry["end"] < self._index["since"]:
+            return [entry["state"]["elapsed"], entry["end"]]
+        # Went on past `since`, or rotated to an archive, after it was counted.
+        return counted.get(entry["key"])
+
+    def _refresh_files(self) -> Dict[str, Dict]:
+        previous = self._index["files"]
+        counted = {e["key"]: e["counted"] for e in previous.values() if e.get("counted")}
+        files = {}
+        try:
+            entries = list(os.scandir(self.logs_path))
+        except FileNotFoundError:
+            entries = []
+        except OSError as e:
+            log.warning(f"Could not list the logs in {self.logs_path}, using the index: {e!r}")
+            return previous
+        for dir_entry in entries:
+            if not dir_entry.name.endswith((".log", ".log.gz")):
+                continue
+            try:
+                entry = self._refresh_file(
+                    self._index["files"].get(dir_entry.name), dir_entry.path, dir_entry.stat()
+                )
+            except (OSError, EOFError, ValueError) as e:
+                log.warning(f"Could not read log {dir_entry.path}: {e!r}")
+                continue
+            if entry is None:
+                continue
+            entry_counted = self._counted(entry, counted)
+            if entry.get("counted") != entry_counted:
+                entry = dict(entry, counted=entry_counted)
+            files[dir_entry.name] = entry
+        return files
+
+    def refresh(self) -> Tuple[float, Optional[float]]:
+        """Returns the minutes played and the end of the last session, as a timestamp."""
+        files = self._refresh_files()
+        if self._dirty or files != self._index["files"]:
+            self._index["files"] = files
+            try:
+                self._save()
+                self._dirty = False
+            except OSError as e:
+                log.warning(f"Could not save the log time index: {e!r}")
+
+        # The same session appears twice while latest.log and its rotated copy both exist.
+        sessions = {}
+        for entry in files.values():
+            if entry.get("counted"):
+                session = tuple(entry["counted"])
+                sessions[entry["key"]] = max(sessions.get(entry["key"], session), session)
+        minutes = sum(elapsed for elapsed, _ in sessions.values()) / 60
+        last_played = max((end for _, end in sessions.values()), default=None)
+        log.debug(f"Got {minutes} minutes from {len(sessions)} launcher log sessions")
+        return minutes, last_played
+
+    async def get_time(self) -> Tuple[float, Optional[float]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
@@ -1,54 +1,57 @@
-import os, asyncio, logging, subprocess, tempfile, pathlib
+import os, json, logging, tempfile, pathlib
+from typing import Dict, Optional
 
-import requests
-from send2trash import send2trash as s2t
 from galaxy.api.plugin import NextStep
 
 from consts import IS_WINDOWS, DIRNAME
+from utils import process
 
 log = logging.getLogger(__name__)
 
 
-async def get_size_at_path(start_path):
-    if start_path is None:
-        return None
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(start_path):
-        for f in filenames:
-            await asyncio.sleep(0)
-            fp = os.path.join(dirpath, f)
-            if not os.path.islink(fp):
-                total_size += os.path.getsize(fp)
-    log.debug(f"Size: {total_size} bytes - {start_path}")
-    return total_size  # in bytes
-
-
-def open_path(path):
-    cmd = f'"{path}"'
-    if not IS_WINDOWS:
-        cmd = "open --wait-apps " + cmd
+async def open_path(path) -> process.Process:
+    if IS_WINDOWS:
+        argv = ["msiexec", "/i", path] if path.lower().endswith(".msi") else [path]
+    else:
+        argv = ["open", "--wait-apps", path]
     log.info(f"Opening: {path}")
-    return run(cmd)
+    return await run(argv)
+
+
+async def run(argv) -> process.Process:
+    """Starts `argv`, a list of arguments or a Windows command line string."""
+    return await process.start(argv)
+
 
+def _log_progress(url):
+    logged = 0
 
-def run(cmd, *, shell=True):
-    log.info(f"Running: {cmd}")
-    return subprocess.Popen(cmd, shell=shell)
+    def progress(done, total):
+        nonlocal logged
+        if total and done * 10 // total > logged:
+            logged = done * 10 // total
+            log.debug(f"Downloaded {logged * 10}% of {url}")
 
+    return progress
 
-async def download(url) -> str:
-    def _download():
-        log.info(f"Downloading: {url}")
-        r = requests.get(url)
-        download_path = os.path.join(tempfile.gettempdir(), url.split("/")[-1])
-        with open(download_path, "wb") as f:
-            f.write(r.content)
-        return download_path
 
-    return await asyncio.get_running_loop().run_in_executor(None, _download)
+async def download(url, cache=None) -> str:
+    """Downloads `url` through the installer `cache` if given, else to the temporary directory."""
+    if cache is not None:
+        log.info(f"Getting: {url}")
+        return await cache.get(url, progress=_log_progress(url))
+
+    # Imported here as aiohttp's client is the slowest import of the plugin and only installs use it.
+    from utils import downloader
+
+    log.info(f"Downloading: {url}")
+    download_path = os.path.join(tempfile.gettempdir(), url.split("/")[-1])
+    return await downloader.download(url, download_path, progress=_log_progress(url))
 
 
 def send2trash(path):
+    from send2trash import send2trash as s2t
+
     log.info(f"Moving to trash: {path}")
     s2t(os.path.abspath(path))
 
@@ -77,5 +80,37 @@ def compare(x, y):
     return min(x, y)
 
 
+def write_atomic(path, text: str):
+    """Writes `text` to a temporary file renamed over `path`, so `path` is never partial."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json(path, data, **kwargs):
+    """`write_atomic` of `data` as JSON, `kwargs` are passed to `json.dumps`."""
+    write_atomic(path, json.dumps(data, **kwargs))
+
+
+def read_versioned_json(path, version: int, description: str) -> Optional[Dict]:
+    """
+    Returns the JSON object in `path` if its "version" is `version`, else None. Missing files are
+    expected, unreadable or outdated ones are logged as ignored `description`.
+    """
+    try:
+        with open(path, "r") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable {description} {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        log.info(f"Ignoring {description} {path} with another version")
+        return None
+    return data
+
+
 def IS(items, *, IN):
     return all(x in IN for x in items)
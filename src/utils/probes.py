@@ -0,0 +1,65 @@
+import asyncio, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+PROBE_WORKERS = 4
+PROBE_TIMEOUT = 10  # in seconds
+
+_current = threading.local()
+
+
+def cancelled() -> bool:
+    """
+    Whether the probe running in the calling thread timed out or was cancelled. Threads can't be
+    interrupted, so probes looping over many items should check it and return early.
+    """
+    event = getattr(_current, "cancelled", None)
+    return event is not None and event.is_set()
+
+
+class ProbeExecutor:
+    """
+    Bounded thread pool for the blocking local I/O of the plugin (registry, filesystem, process
+    lookups), so JSON-RPC requests never queue behind it on the event loop. Probes that haven't
+    started when they time out or are cancelled never run; running ones are told through
+    `cancelled()`.
+    """
+
+    def __init__(self, max_workers: int = PROBE_WORKERS):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor = None
+
+    @staticmethod
+    def _call(event, fn, args, kwargs):
+        _current.cancelled = event
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.cancelled = None
+
+    async def run(self, fn: Callable, *args, timeout: float = PROBE_TIMEOUT, **kwargs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="probe")
+        event = threading.Event()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._call, event, fn, args, kwargs
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            event.set()
+            log.warning(f"Probe {getattr(fn, '__qualname__', fn)} timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            event.set()
+            raise
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+probe_executor = ProbeExecutor()
@@ -0,0 +1,79 @@
+import asyncio, logging, subprocess
+from typing import List, Optional, Union
+
+log = logging.getLogger(__name__)
+
+LAUNCH_TIMEOUT = 10  # in seconds
+
+
+class Process:
+    """
+    Awaitable handle of a started process. Wraps an `asyncio.subprocess.Process`, or a `Popen`
+    waited on in the default executor on event loops that can't spawn subprocesses (the
+    `SelectorEventLoop` used by default on Windows before Python 3.8).
+    """
+
+    def __init__(self, process, argv: Union[List[str], str]):
+        self._process = process
+        self.argv = argv
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def returncode(self) -> Optional[int]:
+        if isinstance(self._process, subprocess.Popen):
+            return self._process.poll()
+        return self._process.returncode
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    async def wait(self) -> int:
+        if isinstance(self._process, subprocess.Popen):
+            return await asyncio.get_running_loop().run_in_executor(None, self._process.wait)
+        return await self._process.wait()
+
+    async def communicate(self):
+        if isinstance(self._process, subprocess.Popen):
+            return await asyncio.get_running_loop().run_in_executor(None, self._process.communicate)
+        return await self._process.communicate()
+
+    def kill(self):
+        if self.returncode is None:
+            self._process.kill()
+
+
+async def start(
+    argv: Union[List[str], str], *, capture_output=False, timeout: float = LAUNCH_TIMEOUT
+) -> Process:
+    """
+    Starts `argv`, a list of arguments or a Windows command line such as a registry
+    UninstallString. Command lines are passed to CreateProcess as they are, as it parses them
+    itself (e.g. unquoted executable paths with spaces), not split and quoted again.
+    """
+    log.info(f"Running: {argv}")
+    pipe = subprocess.PIPE if capture_output else None
+    if isinstance(argv, str):
+        return Process(subprocess.Popen(argv, stdout=pipe, stderr=pipe), argv)
+    try:
+        process = await asyncio.wait_for(
+            asyncio.create_subprocess_exec(*argv, stdout=pipe, stderr=pipe), timeout
+        )
+    except NotImplementedError:
+        process = subprocess.Popen(argv, stdout=pipe, stderr=pipe)
+    return Process(process, argv)
+
+
+async def run(
+    argv: Union[List[str], str], *, capture_output=False, timeout: float = None
+) -> subprocess.CompletedProcess:
+    """Runs `argv` to completion, killing it if it takes longer than `timeout` seconds."""
+    process = await start(argv, capture_output=capture_output)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise
+    return subprocess.CompletedProcess(argv, process.returncode, stdout, stderr)
@@ -0,0 +1,175 @@
+import os, re, sys, logging, threading, subprocess
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+SCAN_INTERVAL = 5  # in seconds
+MAX_LOOKUPS = 256  # per scan
+
+# `cmdline` is a tuple of arguments, empty where the backend can't read it.
+ProcessInfo = namedtuple("ProcessInfo", ["pid", "exe", "cmdline"])
+
+
+class ProcfsBackend:
+    """Reads processes from a Linux style /proc."""
+
+    def __init__(self, root="/proc"):
+        self.root = root
+
+    def pids(self) -> Iterable[int]:
+        return [int(name) for name in os.listdir(self.root) if name.isdigit()]
+
+    def info(self, pid) -> Optional[ProcessInfo]:
+        proc = os.path.join(self.root, str(pid))
+        try:
+            exe = os.readlink(os.path.join(proc, "exe"))
+        except OSError:
+            exe = None
+        try:
+            with open(os.path.join(proc, "cmdline"), "rb") as f:
+                cmdline = tuple(
+                    arg.decode(errors="replace") for arg in f.read().split(b"\0") if arg
+                )
+        except OSError:
+            return None
+        return ProcessInfo(pid, exe, cmdline)
+
+
+class PsBackend:
+    """Lists processes with one `ps` call per scan (macOS, which has no /proc)."""
+
+    def __init__(self):
+        self._exes = {}
+
+    def pids(self) -> Iterable[int]:
+        output = subprocess.run(
+            ["ps", "-axww", "-o", "pid=,comm="], stdout=subprocess.PIPE, check=True
+        ).stdout.decode(errors="replace")
+        self._exes = {}
+        for line in output.splitlines():
+            pid, _, exe = line.strip().partition(" ")
+            if pid.isdigit():
+                self._exes[int(pid)] = exe.strip()
+        return list(self._exes)
+
+    def info(self, pid) -> Optional[ProcessInfo]:
+        if pid not in self._exes:
+            return None
+        return ProcessInfo(pid, self._exes[pid], ())
+
+
+class Win32Backend:
+    """Lists processes with EnumProcesses and QueryFullProcessImageNameW."""
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._psapi = ctypes.WinDLL("psapi")
+        self._kernel32 = ctypes.WinDLL("kernel32")
+
+    def pids(self) -> Iterable[int]:
+        ctypes, wintypes = self._ctypes, self._wintypes
+        size = 1024
+        while True:
+            pids = (wintypes.DWORD * size)()
+            needed = wintypes.DWORD()
+            if not self._psapi.EnumProcesses(pids, ctypes.sizeof(pids), ctypes.byref(needed)):
+                return []
+            if needed.value < ctypes.sizeof(pids):
+                return list(pids[: needed.value // ctypes.sizeof(wintypes.DWORD)])
+            size *= 2
+
+    def info(self, pid) -> Optional[ProcessInfo]:
+        ctypes, wintypes = self._ctypes, self._wintypes
+        handle = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            buffer = ctypes.create_unicode_buffer(32768)
+            size = wintypes.DWORD(len(buffer))
+            if not self._kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return None
+            return ProcessInfo(pid, buffer.value, ())
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+
+def default_backend():
+    if sys.platform == "win32":
+        return Win32Backend()
+    if os.path.isdir("/proc/self"):
+        return ProcfsBackend()
+    return PsBackend()
+
+
+def _normcase(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def path_matcher(roots: Iterable[str]) -> Callable[[ProcessInfo], bool]:
+    """
+    Matches processes whose executable is inside one of `roots` or whose command line mentions
+    one of them, e.g. the Java process of a MultiMC instance.
+    """
+    roots = [_normcase(root) for root in roots if root]
+    # A whole root in an argument, which can also be a list of paths or an option's value (e.g.
+    # -Djava.library.path=<root>/natives), so /games/MultiMC doesn't match /games/MultiMC-old.
+    before, after = r"""(?:^|(?<=[=:;,\s"']))""", r"""(?=[\\/:;,\s"']|$)"""
+    pattern = re.compile("|".join(before + re.escape(root) + after for root in roots) or "(?!)")
+
+    def inside(path: str) -> bool:
+        path = _normcase(path)
+        return any(path == root or path.startswith(os.path.join(root, "")) for root in roots)
+
+    def match(info: ProcessInfo) -> bool:
+        if info.exe is not None and inside(info.exe):
+            return True
+        return any(pattern.search(_normcase(arg)) for arg in info.cmdline)
+
+    return match
+
+
+class ProcessScanner:
+    """
+    Incremental process scanner. Each scan lists the running PIDs and only looks up processes it
+    hasn't seen before, at most `max_lookups` of them, so the cost of a scan stays bounded;
+    remaining new processes are looked up by the following scans. Lookups are cached for as long
+    as the PID is alive.
+    """
+
+    def __init__(self, backend=None, max_lookups: int = MAX_LOOKUPS):
+        self.backend = backend or default_backend()
+        self.max_lookups = max_lookups
+        self._processes: Dict[int, Optional[ProcessInfo]] = {}
+        self._lock = threading.Lock()
+
+    def scan(self) -> List[ProcessInfo]:
+        # A scan that timed out may still be running in an executor thread.
+        with self._lock:
+            return self._scan()
+
+    def _scan(self) -> List[ProcessInfo]:
+        pids = set(self.backend.pids())
+        for pid in self._processes.keys() - pids:
+            del self._processes[pid]
+        new = pids - self._processes.keys()
+        for pid in list(new)[: self.max_lookups]:
+            self._processes[pid] = self.backend.info(pid)
+        if len(new) > self.max_lookups:
+            log.debug(f"Deferring lookup of {len(new) - self.max_lookups} processes")
+        return [info for info in self._processes.values() if info is not None]
+
+    def find(self, matchers: Dict[str, Callable[[ProcessInfo], bool]]) -> Dict[str, List[int]]:
+        """Scans and returns the PIDs matched by each of `matchers`, omitting keys with none."""
+        found = {}
+        for info in self.scan():
+            for key, match in matchers.items():
+                if match(info):
+                    found.setdefault(key, []).append(info.pid)
+        return found
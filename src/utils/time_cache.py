@@ -0,0 +1,130 @@
+import json, pickle, logging
+from typing import Dict, Optional, Tuple
+
+from utils import misc
+
+log = logging.getLogger(__name__)
+
+# Game time caches are dicts of `{game_id: {"time_played": minutes, "last_played": timestamp}}`
+# as used by `galaxyutils.time_tracker.TimeTracker`. They are stored as compact JSON:
+#   {"version": 1, "games": {game_id: [time_played, last_played]}}
+# in the play time cache file and as one `[time_played, last_played]` entry per game under
+# PERSISTENT_CACHE_PREFIX in the plugin's persistent cache. Older versions stored the whole
+# dict as a hex encoded pickle, which is still read.
+VERSION = 1
+FILE_HEADER = "# DO NOT EDIT THIS FILE\n"
+PERSISTENT_CACHE_PREFIX = "game_time/"
+LEGACY_PERSISTENT_CACHE_KEY = "game_time_cache"
+
+TimeCache = Dict[str, Dict[str, float]]
+
+
+class UnsupportedVersion(Exception):
+    pass
+
+
+# Raised reading a cache of another version, or one truncated or otherwise corrupted.
+READ_ERRORS = (UnsupportedVersion, ValueError, EOFError, pickle.UnpicklingError)
+
+
+def _compact(record: Dict[str, float]) -> list:
+    # Sub-second precision is meaningless for both values and makes up most of their length.
+    last_played = record["last_played"]
+    return [
+        round(record["time_played"], 3),
+        int(last_played) if last_played is not None else None,
+    ]
+
+
+def dump_record(record: Dict[str, float]) -> str:
+    return json.dumps(_compact(record), separators=(",", ":"))
+
+
+def load_record(data: str) -> Dict[str, float]:
+    time_played, last_played = json.loads(data)
+    return {"time_played": time_played, "last_played": last_played}
+
+
+def dumps(cache: TimeCache, *, journal: int = None) -> str:
+    data = {
+        "version": VERSION,
+        "games": {game_id: _compact(record) for game_id, record in cache.items()},
+    }
+    if journal is not None:
+        data["journal"] = journal
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _loads(data: str) -> Tuple[TimeCache, Optional[int]]:
+    data = data.strip()
+    if not data.startswith("{"):
+        return pickle.loads(bytes.fromhex(data)), None
+    parsed = json.loads(data)
+    if parsed.get("version") != VERSION:
+        raise UnsupportedVersion(parsed.get("version"))
+    cache = {
+        game_id: {"time_played": time_played, "last_played": last_played}
+        for game_id, (time_played, last_played) in parsed["games"].items()
+    }
+    return cache, parsed.get("journal")
+
+
+def loads(data: str) -> TimeCache:
+    return _loads(data)[0]
+
+
+def read_snapshot(path) -> Tuple[Optional[TimeCache], Optional[int]]:
+    """
+    Returns the cache stored in the file at `path` and the generation of the play time journal
+    it was compacted from, if any. An unreadable file is logged and treated as missing.
+    """
+    try:
+        with open(path, "r") as file:
+            for line in file:
+                if line[:1] != "#" and line.strip():
+                    return _loads(line)
+    except FileNotFoundError:
+        pass
+    except (OSError, *READ_ERRORS) as e:
+        log.warning(f"Ignoring unreadable play time cache file {path}: {e!r}")
+    return None, None
+
+
+def read_file(path) -> Optional[TimeCache]:
+    return read_snapshot(path)[0]
+
+
+def write_file(path, cache: TimeCache, *, journal: int = None):
+    misc.write_atomic(path, FILE_HEADER + dumps(cache, journal=journal))
+
+
+def load_persistent_cache(persistent_cache: Dict[str, str]) -> Optional[TimeCache]:
+    """Returns the cache stored in `persistent_cache`, or None if it has none or it's unreadable."""
+    try:
+        cache = {
+            key[len(PERSISTENT_CACHE_PREFIX) :]: load_record(value)
+            for key, value in persistent_cache.items()
+            if key.startswith(PERSISTENT_CACHE_PREFIX)
+        }
+        if cache:
+            return cache
+        if LEGACY_PERSISTENT_CACHE_KEY in persistent_cache:
+            return loads(persistent_cache[LEGACY_PERSISTENT_CACHE_KEY])
+    except READ_ERRORS as e:
+        log.warning(f"Ignoring unreadable play time persistent cache: {e!r}")
+    return None
+
+
+def update_persistent_cache(persistent_cache: Dict[str, str], cache: TimeCache) -> bool:
+    """
+    Writes the records of `cache` that changed into `persistent_cache`, migrating away from the
+    legacy entry. Returns whether anything changed, i.e. whether the cache needs to be pushed.
+    """
+    changed = persistent_cache.pop(LEGACY_PERSISTENT_CACHE_KEY, None) is not None
+    for game_id, record in cache.items():
+        key = PERSISTENT_CACHE_PREFIX + game_id
+        value = dump_record(record)
+        if persistent_cache.get(key) != value:
+            persistent_cache[key] = value
+            changed = True
+    return changed
@@ -0,0 +1,129 @@
+import os, json, logging
+from typing import Dict, Iterable, Optional
+
+from utils import misc, time_cache
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_INTERVAL = 60  # in seconds
+COMPACT_AFTER = 200  # journal entries
+
+START, CHECKPOINT, STOP = "start", "checkpoint", "stop"
+
+
+def _add_session(cache: time_cache.TimeCache, game_id, start, end):
+    record = cache.setdefault(game_id, {"time_played": 0, "last_played": None})
+    record["time_played"] += max(end - start, 0) / 60
+    record["last_played"] = end
+
+
+def replay(cache: time_cache.TimeCache, events: Iterable[list]) -> time_cache.TimeCache:
+    """
+    Adds the sessions recorded by `events` to `cache`. A session that was never stopped, e.g.
+    because Galaxy crashed, is counted up to its last checkpoint.
+    """
+    sessions = {}  # game_id: [start, last seen]
+    for kind, game_id, timestamp in events:
+        if kind == START:
+            if game_id in sessions:
+                _add_session(cache, game_id, *sessions[game_id])
+            sessions[game_id] = [timestamp, timestamp]
+        elif game_id in sessions:
+            sessions[game_id][1] = timestamp
+            if kind == STOP:
+                _add_session(cache, game_id, *sessions.pop(game_id))
+    for game_id, (start, last_seen) in sessions.items():
+        _add_session(cache, game_id, start, last_seen)
+    return cache
+
+
+class TimeJournal:
+    """
+    Append-only journal of play sessions backing the play time cache file at `snapshot_path`.
+    Every start, stop and periodic checkpoint of a tracked game is appended as one JSON line to
+    `path`, so a crash loses at most the time since the last checkpoint. `compact` atomically
+    rewrites the snapshot and starts a new journal generation; the snapshot stores the generation
+    it replaces so a crash between the two writes never counts a session twice.
+    """
+
+    def __init__(self, snapshot_path, path):
+        self.snapshot_path = snapshot_path
+        self.path = path
+        self.generation = 0
+        self._entries = 0
+        self._file = None
+
+    def _read(self, generation) -> list:
+        events = []
+        try:
+            with open(self.path, "r") as file:
+                header = json.loads(file.readline() or "{}")
+                if not isinstance(header, dict) or header.get("generation") != generation:
+                    log.debug(f"Skipping play time journal of generation {header}")
+                    return events
+                for line in file:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # Only the last line can be torn by a crash while appending.
+                        log.warning(f"Ignoring unreadable play time journal entry: {line!r}")
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            log.warning(f"Ignoring unreadable play time journal: {e}")
+        return events
+
+    def load(self) -> Optional[time_cache.TimeCache]:
+        """Returns the snapshot with the journal replayed into it, or None if neither exists."""
+        cache, generation = time_cache.read_snapshot(self.snapshot_path)
+        self.generation = generation or 0
+        events = self._read(self.generation)
+        if cache is None and not events:
+            return None
+        cache = replay(cache or {}, events)
+        log.info(f"Replayed {len(events)} play time journal entries")
+        return cache
+
+    def _append(self, kind, game_id, timestamp):
+        if self._file is None:
+            new = not os.path.exists(self.path)
+            self._file = open(self.path, "a")
+            if new:
+                self._file.write(json.dumps({"generation": self.generation}) + "\n")
+        self._file.write(json.dumps([kind, game_id, timestamp]) + "\n")
+        self._file.flush()
+        self._entries += 1
+
+    def start(self, game_id, timestamp):
+        self._append(START, game_id, timestamp)
+
+    def checkpoint(self, game_ids: Iterable[str], timestamp):
+        for game_id in game_ids:
+            self._append(CHECKPOINT, game_id, timestamp)
+
+    def stop(self, game_id, timestamp):
+        self._append(STOP, game_id, timestamp)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._entries >= COMPACT_AFTER
+
+    def compact(self, cache: time_cache.TimeCache, running: Dict[str, float]):
+        """
+        Writes `cache` as the new snapshot and restarts the journal with the sessions in `running`
+        (game_id: time up to which the session is already included in `cache`).
+        """
+        self.close()
+        generation = self.generation + 1
+        time_cache.write_file(self.snapshot_path, cache, journal=generation)
+        lines = [{"generation": generation}]
+        lines += [[START, game_id, timestamp] for game_id, timestamp in running.items()]
+        misc.write_atomic(self.path, "".join(json.dumps(line) + "\n" for line in lines))
+        self.generation = generation
+        self._entries = 0
+        log.debug(f"Compacted play time journal to generation {generation}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
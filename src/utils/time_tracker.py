@@ -1,9 +1,45 @@
+from time import time
+
 from galaxyutils.time_tracker import TimeTracker as OGTimeTracker
 
+from utils.time_journal import TimeJournal
+
 
 class TimeTracker(OGTimeTracker):
+    def __init__(self, game_time_cache=None, journal: TimeJournal = None):
+        super().__init__(game_time_cache=game_time_cache)
+        self.journal = journal
+
     def get_tracking_games(self):
         return [game_id for game_id in self._running_games_dict]
 
+    def start_tracking_game(self, game_id, start_time=None):
+        start_time = start_time or time()
+        super().start_tracking_game(game_id, start_time)
+        if self.journal is not None:
+            self.journal.start(game_id, start_time)
+
+    def stop_tracking_game(self, game_id):
+        super().stop_tracking_game(game_id)
+        if self.journal is not None:
+            self.journal.stop(game_id, self._game_time_cache[game_id]["last_played"])
+
+    def checkpoint(self):
+        if self.journal is not None:
+            self.journal.checkpoint(self.get_tracking_games(), time())
+            if self.journal.needs_compaction:
+                self.compact()
+
+    def compact(self):
+        # Running games' time is only added to the cache up to their "last_played" marker.
+        if self.journal is not None:
+            self.journal.compact(
+                self.get_time_cache(ignore_tracking=True),
+                {
+                    game_id: self._game_time_cache[game_id]["last_played"]
+                    for game_id in self._running_games_dict
+                },
+            )
+
 
 from galaxyutils.time_tracker import GameNotTrackedException  # noqa: ignore F401
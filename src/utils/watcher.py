@@ -0,0 +1,124 @@
+import asyncio, logging
+from typing import Awaitable, Callable
+
+from utils.instrumentation import metrics
+
+log = logging.getLogger(__name__)
+
+WATCH_INTERVAL = 5  # in seconds
+FAST_WATCH_INTERVAL = 1  # in seconds
+MAX_WATCH_INTERVAL = 30  # in seconds
+BACKOFF = 2
+
+# Returned by `_poll` when the probe failed, which is never a change.
+_FAILED = object()
+
+
+class PollingWatcher:
+    """
+    Awaits `probe` every `interval` seconds and calls `on_change` with its result whenever it
+    differs from the previous one. `probe` should be cheap, e.g. stat calls or cached lookups that
+    are revalidated with them, run on the probe executor. Used where no native change
+    notifications are available.
+
+    With a `max_interval` the watcher adapts its rate: after a change or a call to `hurry` it
+    polls every `fast_interval` seconds, then backs off by `BACKOFF` on every unchanged poll, up
+    to `interval` while `idle()` is False and up to `max_interval` while it is True. Each wait
+    is recorded in the `watcher.<name>` metric, whose count is the number of wakeups.
+
+    A failed probe keeps the previous result and backs off up to `max_interval`, and errors raised by
+    `on_change` are logged, so neither stops the watcher.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable],
+        on_change: Callable,
+        interval: float = WATCH_INTERVAL,
+        *,
+        name: str = "watcher",
+        max_interval: float = None,
+        fast_interval: float = FAST_WATCH_INTERVAL,
+        idle: Callable[[], bool] = None,
+    ):
+        self._probe = probe
+        self._on_change = on_change
+        self.interval = interval
+        self.name = name
+        self.max_interval = max_interval
+        self.fast_interval = fast_interval
+        self._idle = idle or (lambda: True)
+        self.delay = interval
+        self._wake: asyncio.Event = None
+        self._task: asyncio.Task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def hurry(self):
+        """Polls right away and then at the fast rate, e.g. after the plugin launched a game."""
+        if self.max_interval is None:
+            return
+        self.delay = self.fast_interval
+        if self._wake is not None:
+            self._wake.set()
+
+    def _next_delay(self, changed: bool, failed: bool = False) -> float:
+        if failed:
+            return min(self.delay * BACKOFF, self.max_interval or MAX_WATCH_INTERVAL)
+        if self.max_interval is None:
+            return self.interval
+        if changed:
+            return self.fast_interval
+        limit = self.max_interval if self._idle() else self.interval
+        return min(self.delay * BACKOFF, limit)
+
+    async def _sleep(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _poll(self):
+        try:
+            return await self._probe()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error(f"Watcher probe failed: {e!r}")
+            return _FAILED
+
+    def _notify(self, value):
+        try:
+            self._on_change(value)
+        except Exception:
+            log.exception(f"Watcher {self.name} change handler failed")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last = await self._poll()
+        while True:
+            slept = loop.time()
+            await self._sleep()
+            if metrics.enabled:
+                metrics.record(f"watcher.{self.name}", loop.time() - slept)
+            value = await self._poll()
+            failed = value is _FAILED
+            changed = not failed and value != last
+            if changed:
+                log.debug(f"Watcher detected change: {last} -> {value}")
+                last = value
+                self._notify(value)
+            self.delay = self._next_delay(changed, failed)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
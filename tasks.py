@@ -14,6 +14,8 @@ import os
 import sys
 import json
 import tempfile
+import compileall
+import py_compile
 from shutil import rmtree
 from distutils.dir_util import copy_tree
 
@@ -43,7 +45,7 @@ def print_task(string):
 
 
 @task
-def build(c, output="build", ziparchive=None):
+def build(c, output="build", ziparchive=None, precompile=True):
     if os.path.exists(output):
         print_task("--> Removing {} directory".format(output))
         rmtree(output)
@@ -74,6 +76,16 @@ def build(c, output="build", ziparchive=None):
     print_task("--> Copying source files")
     copy_tree("src", output)
 
+    # Galaxy would otherwise compile every module on the first start of the plugin. Hash based
+    # pycs stay valid when the release zip is extracted with new mtimes.
+    if precompile and sys.version_info[:2] == (3, 7):
+        print_task("--> Precompiling bytecode")
+        compileall.compile_dir(
+            output, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH
+        )
+    elif precompile:
+        print_task("--> Not precompiling bytecode, Galaxy runs Python 3.7")
+
     if ziparchive is not None:
         print_task("--> Compressing to {}".format(ziparchive))
         zip_folder_to_file(output, ziparchive)
@@ -0,0 +1,7 @@
+import os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# The plugin's modules import each other from src, the fakes are shared with the benchmarks.
+for path in (os.path.join(ROOT, "src"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,155 @@
+import os, time, asyncio
+
+import pytest
+
+from utils import dirsize
+from utils.dirsize import SizeEngine, SizeIndex, outermost
+
+
+def _file(path, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+
+
+def _tree(root) -> str:
+    _file(os.path.join(root, "a.dat"), 100)
+    _file(os.path.join(root, "x", "b.dat"), 200)
+    _file(os.path.join(root, "x", "y", "c.dat"), 300)
+    _file(os.path.join(root, "z", "d.dat"), 400)
+    return root
+
+
+class CountingEngine(SizeEngine):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.walks = []
+
+    async def walk(self, root, **kwargs):
+        self.walks.append(root)
+        return await super().walk(root, **kwargs)
+
+
+def test_outermost():
+    a = os.path.join(os.sep, "a")
+    paths = [a, a + " b", os.path.join(a, "x"), a + "-old", a + ".bak", a + os.sep, a + " b"]
+    assert outermost(paths) == [a, a + " b", a + "-old", a + ".bak"]
+    assert outermost([os.path.join(a, "x", "y"), os.path.join(a, "x")]) == [os.path.join(a, "x")]
+
+
+def test_scan_and_rescan_dir(tmp_path):
+    root = _tree(str(tmp_path / "root"))
+    record = dirsize.scan_dir(root)
+    assert record.size == 100
+    assert sorted(record.subdirs) == [os.path.join(root, "x"), os.path.join(root, "z")]
+    assert dirsize.scan_dir(os.path.join(root, "missing")) is None
+
+    # Unchanged directories aren't listed again, even if a file was rewritten in place.
+    _file(os.path.join(root, "a.dat"), 150)
+    assert dirsize.rescan_dir(root, record) is record
+    os.utime(root, ns=(0, record.mtime + 10**9))
+    assert dirsize.rescan_dir(root, record).size == 150
+    assert dirsize.rescan_dir(os.path.join(root, "missing"), record) is None
+
+
+def test_engine_get_size(tmp_path):
+    root = _tree(str(tmp_path / "root"))
+    engine = SizeEngine(max_workers=2)
+    assert asyncio.run(engine.get_size(root)) == 1000
+    total, subtrees = asyncio.run(engine.get_size(root, subtrees=True))
+    assert total == 1000
+    assert subtrees == {os.path.join(root, "x"): 500, os.path.join(root, "z"): 400}
+
+
+def test_engine_walk_reuses_unchanged_directories(tmp_path, monkeypatch):
+    root = _tree(str(tmp_path / "root"))
+    engine = SizeEngine(max_workers=2)
+    previous = asyncio.run(engine.walk(root))
+    scanned = []
+    scan_dir = dirsize.scan_dir
+    monkeypatch.setattr(dirsize, "scan_dir", lambda path: scanned.append(path) or scan_dir(path))
+    _file(os.path.join(root, "z", "e.dat"), 50)
+    records = asyncio.run(engine.walk(root, previous=previous))
+    assert scanned == [os.path.join(root, "z")]
+    assert dirsize.total_size(records, root) == 1050
+
+
+def test_engine_walk_timeout(tmp_path, monkeypatch):
+    root = _tree(str(tmp_path / "root"))
+    rescan_dir = dirsize.rescan_dir
+
+    def slow_rescan_dir(path, previous):
+        time.sleep(0.05)
+        return rescan_dir(path, previous)
+
+    monkeypatch.setattr(dirsize, "rescan_dir", slow_rescan_dir)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(SizeEngine(max_workers=1).walk(root, timeout=0.01))
+
+
+def test_index_returns_last_size_and_refreshes(tmp_path):
+    root = _tree(str(tmp_path / "root"))
+    index_path = str(tmp_path / "index.json")
+
+    async def run():
+        engine = CountingEngine()
+        index = SizeIndex(index_path, engine)
+        assert index.total(root) is None
+        assert await index.get_size(root) == 1000
+        _file(os.path.join(root, "z", "e.dat"), 50)
+        # The last known size, while a refresh runs in the background.
+        assert await index.get_size(root) == 1000
+        await index._refresh_tasks[os.path.normpath(root)]
+        assert index.total(root) == 1050
+        index.close()
+        return engine
+
+    assert len(asyncio.run(run()).walks) == 2
+    # Persisted, so a new index knows the size without walking.
+    assert SizeIndex(index_path, CountingEngine()).total(root) == 1050
+
+
+def test_index_refresh_drops_removed_directories(tmp_path):
+    root = _tree(str(tmp_path / "root"))
+    index = SizeIndex(str(tmp_path / "index.json"), CountingEngine())
+    asyncio.run(index.refresh(root))
+    os.remove(os.path.join(root, "x", "y", "c.dat"))
+    os.rmdir(os.path.join(root, "x", "y"))
+    assert asyncio.run(index.refresh(root)) == 700
+    assert os.path.join(root, "x", "y") not in index._records
+
+
+def test_index_walk_survives_cancelled_caller(tmp_path):
+    root = _tree(str(tmp_path / "root"))
+
+    async def run():
+        engine = CountingEngine()
+        index = SizeIndex(str(tmp_path / "index.json"), engine)
+        first = asyncio.ensure_future(index.get_size(root))
+        second = asyncio.ensure_future(index.get_size(root))
+        await asyncio.sleep(0)
+        first.cancel()
+        # The walk is shared and shielded from the cancelled caller.
+        assert await second == 1000
+        assert first.cancelled()
+        return engine.walks
+
+    assert len(asyncio.run(run())) == 1
+
+
+def test_get_sizes_walks_nested_roots_once(tmp_path):
+    a = _tree(str(tmp_path / "a"))
+    _tree(str(tmp_path / "a b"))
+    nested = os.path.join(a, "x")
+
+    async def run():
+        engine = CountingEngine()
+        index = SizeIndex(str(tmp_path / "index.json"), engine)
+        sizes = await index.get_sizes(
+            {"game": [a, str(tmp_path / "a b"), nested], "launcher": [nested], "none": [None]}
+        )
+        return sizes, engine.walks
+
+    sizes, walks = asyncio.run(run())
+    assert sizes == {"game": 2000, "launcher": 500, "none": None}
+    assert sorted(walks) == [a, str(tmp_path / "a b")]
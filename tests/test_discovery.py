@@ -0,0 +1,89 @@
+import os, time, asyncio
+
+from utils import discovery
+
+
+def _installation(folder):
+    os.makedirs(os.path.join(folder, "MultiMC"))
+    return os.path.join(folder, "MultiMC")
+
+
+def _match(folder, entry):
+    return entry.path if entry.name == "MultiMC" else None
+
+
+def _discover(tmp_path, roots, match=_match, timeout=5):
+    d = discovery.Discovery(lambda: roots, match, os.path.isdir, str(tmp_path / "discovery.json"))
+    try:
+        start = time.monotonic()
+        found = asyncio.run(d.discover(timeout))
+        return found, time.monotonic() - start
+    finally:
+        d.close()
+
+
+def test_search_stops_at_first_match(tmp_path):
+    found = _installation(str(tmp_path / "a" / "b"))
+    _installation(str(tmp_path / "a" / "b" / "c" / "d"))
+    visited = set()
+    result = discovery.search(str(tmp_path), _match, deadline=time.monotonic() + 5, visited=visited)
+    assert result == [found]
+    assert os.path.normcase(str(tmp_path / "a" / "b" / "c")) not in visited
+
+
+def test_search_skips_pruned_and_deep_folders(tmp_path):
+    _installation(str(tmp_path / "node_modules"))
+    _installation(str(tmp_path / ".hidden"))
+    _installation(str(tmp_path / "a" / "b" / "c"))
+    deadline = time.monotonic() + 5
+    assert (
+        discovery.search(str(tmp_path), _match, max_depth=2, deadline=deadline, visited=set()) == []
+    )
+    assert discovery.search(
+        str(tmp_path), _match, max_depth=3, deadline=deadline, visited=set()
+    ) == [str(tmp_path / "a" / "b" / "c" / "MultiMC")]
+
+
+def test_discover_prefers_likeliest_root(tmp_path):
+    likely = _installation(str(tmp_path / "likely"))
+    _installation(str(tmp_path / "other"))
+
+    def match(folder, entry):
+        if folder.startswith(str(tmp_path / "likely")):
+            time.sleep(0.1)  # finishes last
+        return _match(folder, entry)
+
+    roots = [(str(tmp_path / "likely"), 1), (str(tmp_path / "other"), 1)]
+    found, _ = _discover(tmp_path, roots, match)
+    assert found == [likely]
+    # Cached for the next time.
+    assert _discover(tmp_path, [])[0] == [likely]
+
+
+def test_discover_skips_missing_and_blocked_roots(tmp_path, monkeypatch):
+    found = _installation(str(tmp_path / "found"))
+    # Any access to it blocks, like a disconnected network drive.
+    blocked = str(tmp_path / "blocked")
+    isdir, scandir = os.path.isdir, os.scandir
+
+    def block(fn):
+        def blocking(path="."):
+            if str(path).startswith(blocked):
+                time.sleep(1)
+            return fn(path)
+
+        return blocking
+
+    monkeypatch.setattr(os.path, "isdir", block(isdir))
+    monkeypatch.setattr(os, "scandir", block(scandir))
+    roots = [(blocked, 1), (str(tmp_path / "missing"), 1), (str(tmp_path / "found"), 1)]
+    result, seconds = _discover(tmp_path, roots, timeout=0.3)
+    assert result == [found]
+    assert seconds < 0.8
+
+
+def test_discover_nothing(tmp_path):
+    os.makedirs(str(tmp_path / "empty"))
+    found, _ = _discover(tmp_path, [(str(tmp_path / "empty"), 2)])
+    assert found == []
+    assert not os.path.exists(str(tmp_path / "discovery.json"))
@@ -0,0 +1,108 @@
+import os, asyncio, hashlib
+
+import pytest
+
+from benchmarks.fixtures import FileServer
+from utils import downloader
+
+SMALL = os.urandom(300 * 1024)
+# Large enough for the first segment and two more.
+LARGE = os.urandom(3 * downloader.MIN_SEGMENT_SIZE + 12345)
+
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _download(server_kwargs, data, path, **kwargs):
+    async def run():
+        async with FileServer(data, **server_kwargs) as server:
+            await downloader.download(server.url, path, **kwargs)
+            return server
+
+    return asyncio.run(run())
+
+
+def test_download(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    server = _download({}, SMALL, path, sha256=hashlib.sha256(SMALL).hexdigest())
+    assert _read(path) == SMALL
+    assert server.requests == 1
+    assert os.listdir(str(tmp_path)) == ["installer.msi"]
+
+
+def test_dropped_connection_is_resumed(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    server = _download({"drop_after": 100 * 1024}, SMALL, path, segments=1)
+    assert _read(path) == SMALL
+    assert server.requests == 2
+    # Only the missing bytes were downloaded again.
+    assert server.bytes_sent < 2 * len(SMALL)
+    assert os.listdir(str(tmp_path)) == ["installer.msi"]
+
+
+def test_segmented_download(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    progress = []
+    server = _download(
+        {}, LARGE, path, segments=3, progress=lambda done, total: progress.append((done, total))
+    )
+    assert _read(path) == LARGE
+    assert server.requests == 3
+    assert server.bytes_sent == len(LARGE)
+    assert progress[-1] == (len(LARGE), len(LARGE))
+
+
+def test_dropped_segment_is_resumed(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    server = _download({"drop_after": 1024 * 1024}, LARGE, path, segments=3)
+    assert _read(path) == LARGE
+    assert server.requests == 4
+
+
+def test_small_file_is_not_segmented(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    server = _download({}, SMALL, path, segments=4)
+    assert _read(path) == SMALL
+    assert server.requests == 1
+
+
+def test_changed_file_is_downloaded_again_on_resume(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    changed = os.urandom(len(SMALL))
+
+    async def run():
+        async with FileServer(SMALL, drop_after=100 * 1024) as server:
+            with pytest.raises(downloader.DownloadError):
+                await downloader.download(server.url, path, segments=1, retries=0)
+            assert os.path.exists(path + ".part")
+            server.data = changed
+            server.etag = '"changed"'
+            await downloader.download(server.url, path, segments=1)
+
+    asyncio.run(run())
+    # The server ignored the range of the old file, nothing of it is spliced in.
+    assert _read(path) == changed
+    assert not os.path.exists(path + ".part.validator")
+
+
+def test_checksum_mismatch(tmp_path):
+    path = str(tmp_path / "installer.msi")
+    with pytest.raises(downloader.DownloadError):
+        _download({}, SMALL, path, sha256="0" * 64)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_not_modified(tmp_path):
+    path = str(tmp_path / "installer.msi")
+
+    async def run():
+        async with FileServer(SMALL) as server:
+            _, headers = await downloader.download_with_headers(server.url, path)
+            with pytest.raises(downloader.NotModified):
+                await downloader.download_with_headers(
+                    server.url, path + "2", headers={"If-None-Match": headers["ETag"]}
+                )
+
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+import os, asyncio, hashlib
+
+from benchmarks.fixtures import FileServer
+from utils.installer_cache import InstallerCache
+
+DATA = os.urandom(300 * 1024)
+
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_installer_cache_replaces_changed_installer(tmp_path):
+    cache_path = str(tmp_path / "cache")
+
+    async def run():
+        async with FileServer(DATA) as server:
+            cache = InstallerCache(cache_path, max_size=10 * len(DATA))
+            first = await cache.get(server.url)
+            assert await cache.get(server.url) == first
+            requests = server.requests
+            server.data = os.urandom(len(DATA))
+            server.etag = '"changed"'
+            second = await cache.get(server.url)
+            return server, requests, first, second
+
+    server, requests, first, second = asyncio.run(run())
+    assert requests == 2
+    assert _read(second) == server.data
+    # The previous version is removed rather than left until eviction.
+    assert not os.path.exists(os.path.dirname(first))
+    assert sorted(os.listdir(cache_path)) == sorted(
+        [hashlib.sha256(server.data).hexdigest(), "index.json"]
+    )
@@ -0,0 +1,132 @@
+import os, asyncio
+
+from benchmarks.fixtures import FakeWinreg, make_uninstall_hive
+from consts import GAME_REGISTY_RELATIVE_LOCATIONS, SOFTWARE_PATHS, GameID
+from local import InstallLocation, InstallLocationResolver, WindowsLocalClient
+import local
+import registry
+
+HIVES = [FakeWinreg.HKEY_CURRENT_USER, FakeWinreg.HKEY_LOCAL_MACHINE]
+KEY_PATH = SOFTWARE_PATHS[1] + GAME_REGISTY_RELATIVE_LOCATIONS[GameID.Minecraft]
+
+
+def _client(fake) -> WindowsLocalClient:
+    return WindowsLocalClient(registry_backend=registry.RegistryBackend(fake, hives=HIVES))
+
+
+def _install(fake, folder, exe="MinecraftLauncher.exe"):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, exe), "wb"):
+        pass
+    fake.create_key(
+        FakeWinreg.HKEY_LOCAL_MACHINE, KEY_PATH, {"InstallLocation": folder, "InstallExe": exe}
+    )
+
+
+def _calls(fake, fn):
+    calls = fake.calls
+    result = fn()
+    return result, fake.calls - calls
+
+
+def test_resolver_caches_until_signature_changes():
+    resolved = []
+    signatures = {"game": 1}
+
+    def resolve(game_id):
+        resolved.append(game_id)
+        return InstallLocation(f"/{game_id}/{signatures[game_id]}", None, None)
+
+    resolver = InstallLocationResolver(resolve, lambda game_id, location: signatures[game_id])
+    assert resolver.get("game").folder == "/game/1"
+    assert resolver.get("game").folder == "/game/1"
+    assert resolved == ["game"]
+    signatures["game"] = 2
+    assert resolver.get("game").folder == "/game/2"
+    resolver.invalidate("game")
+    resolver.get("game")
+    assert resolved == ["game"] * 3
+
+
+def test_finds_launcher_in_registry(tmp_path):
+    fake = make_uninstall_hive(5)
+    folder = str(tmp_path / "Minecraft Launcher")
+    _install(fake, folder)
+    client = _client(fake)
+    assert client.find_launcher_path(GameID.Minecraft) == os.path.join(
+        folder, "MinecraftLauncher.exe"
+    )
+    assert client.find_launcher_path(GameID.Minecraft, folder=True) == folder
+    assert client.find_launcher_path(GameID.MinecraftDungeons) is None
+
+
+def test_cached_lookup_only_probes_the_key(tmp_path):
+    fake = make_uninstall_hive(5)
+    _install(fake, str(tmp_path / "launcher"))
+    client = _client(fake)
+    expected, _ = _calls(fake, lambda: client.find_launcher_path(GameID.Minecraft))
+    path, calls = _calls(fake, lambda: client.find_launcher_path(GameID.Minecraft))
+    assert path == expected
+    # OpenKey and QueryInfoKey of the game's own key.
+    assert calls == 2
+
+
+def test_install_update_and_removal_are_picked_up(tmp_path):
+    fake = make_uninstall_hive(5)
+    client = _client(fake)
+    assert client.find_launcher_path(GameID.Minecraft) is None
+    _, calls = _calls(fake, lambda: client.find_launcher_path(GameID.Minecraft))
+    # Only the InstalledProducts keys are probed while the game isn't installed, here they
+    # don't exist yet.
+    assert calls == len(HIVES) * len(SOFTWARE_PATHS)
+
+    _install(fake, str(tmp_path / "old"))
+    assert client.find_launcher_path(GameID.Minecraft, folder=True) == str(tmp_path / "old")
+    _install(fake, str(tmp_path / "new"))
+    assert client.find_launcher_path(GameID.Minecraft, folder=True) == str(tmp_path / "new")
+    os.remove(str(tmp_path / "new" / "MinecraftLauncher.exe"))
+    fake.hives[FakeWinreg.HKEY_LOCAL_MACHINE].subkeys["SOFTWARE"].subkeys.pop("WOW6432Node")
+    assert client.find_launcher_path(GameID.Minecraft) is None
+
+
+def test_registry_connections_are_pooled(tmp_path):
+    fake = make_uninstall_hive(5)
+    _install(fake, str(tmp_path / "launcher"))
+    connections = []
+    connect = fake.ConnectRegistry
+    fake.ConnectRegistry = lambda computer, hive: connections.append(hive) or connect(None, hive)
+    client = _client(fake)
+    for game_id in (GameID.Minecraft, GameID.MinecraftDungeons) * 3:
+        client.install_locations.invalidate()
+        client.find_launcher_path(game_id)
+        client._find_uninstall_string(game_id)
+    assert sorted(connections) == HIVES
+
+
+def test_uninstall_index_sees_new_uninstallers():
+    fake = make_uninstall_hive(20)
+    client = _client(fake)
+    assert client._find_uninstall_string(GameID.Minecraft) == "MsiExec.exe /X{MINECRAFT}"
+    assert client._find_uninstall_string(GameID.MinecraftDungeons) is None
+    fake.create_key(
+        FakeWinreg.HKEY_CURRENT_USER,
+        SOFTWARE_PATHS[0] + "Microsoft\\Windows\\CurrentVersion\\Uninstall\\{DUNGEONS}",
+        {"DisplayName": "Minecraft Dungeons Launcher", "UninstallString": "dungeons /uninstall"},
+    )
+    assert client._find_uninstall_string(GameID.MinecraftDungeons) == "dungeons /uninstall"
+
+
+def test_uninstall_runs_uninstaller_and_resolves_again(tmp_path, monkeypatch):
+    fake = make_uninstall_hive(5)
+    _install(fake, str(tmp_path / "launcher"))
+    client = _client(fake)
+    client.find_launcher_path(GameID.Minecraft)
+    ran = []
+
+    async def run(command):
+        ran.append(command)
+
+    monkeypatch.setattr(local.misc, "run", run)
+    asyncio.run(client.uninstall(GameID.Minecraft))
+    assert ran == ["MsiExec.exe /X{MINECRAFT}"]
+    assert GameID.Minecraft not in client.install_locations._cache
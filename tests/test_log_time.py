@@ -0,0 +1,85 @@
+import os, gzip
+from datetime import datetime
+
+from benchmarks.fixtures import make_plugin
+from consts import GameID
+from utils import time_cache
+from utils.log_time import LogTimeSource
+
+# Longer than the head identifying a session, so appending doesn't change it.
+FIRST_LINE = b"[10:00:00] [main/INFO]: Setting user: Player" + b" " * 600 + b"\n"
+SINCE = datetime(2021, 1, 1).timestamp()
+
+
+def _write(path, data: bytes, mtime: datetime):
+    with (gzip.open if path.endswith(".gz") else open)(path, "wb") as f:
+        f.write(data)
+    os.utime(path, (mtime.timestamp(), mtime.timestamp()))
+
+
+def _source(tmp_path) -> LogTimeSource:
+    source = LogTimeSource(str(tmp_path / "logs"), str(tmp_path / "log_time.json"))
+    source._index["since"] = SINCE
+    return source
+
+
+def test_counts_sessions_before_index_creation(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _write(
+        str(logs / "2020-06-01-1.log.gz"),
+        FIRST_LINE + b"[11:00:00] [main/INFO]: Stopping!\n",
+        datetime(2020, 6, 1, 11),
+    )
+    # Played after the index was created, tracked by the plugin instead.
+    _write(
+        str(logs / "2021-02-01-1.log.gz"),
+        FIRST_LINE + b"[12:00:00] [main/INFO]: Stopping!\n",
+        datetime(2021, 2, 1, 12),
+    )
+    minutes, last_played = _source(tmp_path).refresh()
+    assert minutes == 60
+    assert last_played == datetime(2020, 6, 1, 11).timestamp()
+
+
+def test_session_running_at_index_creation_is_frozen(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    latest = str(logs / "latest.log")
+    session = FIRST_LINE + b"[10:30:00] [main/INFO]: Saving chunks\n"
+    _write(latest, session, datetime(2020, 12, 31, 10, 30))
+    assert _source(tmp_path).refresh()[0] == 30
+
+    # The session went on past the index creation, then was rotated by the next launch.
+    session += b"[10:45:00] [main/INFO]: Stopping!\n"
+    _write(latest, session, datetime(2021, 1, 2, 10, 45))
+    source = LogTimeSource(str(logs), str(tmp_path / "log_time.json"))
+    assert source.refresh()[0] == 30
+    _write(str(logs / "2021-01-02-1.log.gz"), session, datetime(2021, 1, 2, 10, 45))
+    _write(latest, b"[09:00:00] [main/INFO]: Setting user: Player\n", datetime(2021, 1, 3, 9))
+    assert source.refresh() == (30, datetime(2020, 12, 31, 10, 30).timestamp())
+
+
+def test_no_history_when_time_was_already_tracked(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _write(
+        str(logs / "2020-06-01-1.log.gz"),
+        FIRST_LINE + b"[11:00:00] [main/INFO]: Stopping!\n",
+        datetime(2020, 6, 1, 11),
+    )
+    index_path = str(tmp_path / "log_time.json")
+    assert LogTimeSource(str(logs), index_path, history=False).refresh() == (0, None)
+    # Decided when the index was created.
+    assert LogTimeSource(str(logs), index_path).refresh() == (0, None)
+
+
+def test_plugin_mines_history_only_without_tracked_time(tmp_path):
+    for played in (0, 90):
+        installed = tmp_path / str(played)
+        installed.mkdir()
+        cache = {GameID.Minecraft: {"time_played": played, "last_played": 1600000000}}
+        time_cache.write_file(str(installed / "minecraft_play_time_cache.txt"), cache)
+        instance = make_plugin(str(installed))
+        assert (instance.log_time._index["since"] == 0) == bool(played)
+        instance.time_journal.close()
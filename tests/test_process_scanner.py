@@ -0,0 +1,102 @@
+import os
+
+from utils.process_scanner import ProcessInfo, ProcessScanner, ProcfsBackend, path_matcher
+
+
+def _process(proc, pid, exe=None, cmdline=None):
+    folder = proc / str(pid)
+    folder.mkdir()
+    if exe is not None:
+        os.symlink(exe, str(folder / "exe"))
+    if cmdline is not None:
+        (folder / "cmdline").write_bytes(b"\0".join(arg.encode() for arg in cmdline) + b"\0")
+
+
+class CountingBackend:
+    def __init__(self, processes):
+        self.processes = processes
+        self.lookups = []
+
+    def pids(self):
+        return list(self.processes)
+
+    def info(self, pid):
+        self.lookups.append(pid)
+        return self.processes[pid]
+
+
+def test_procfs_backend(tmp_path):
+    proc = tmp_path / "proc"
+    proc.mkdir()
+    _process(proc, 1, "/usr/bin/java", ["java", "-jar", "/games/MultiMC/instances/a/x.jar"])
+    _process(proc, 22, cmdline=[])
+    _process(proc, 333, "/usr/bin/zombie")
+    (proc / "self").mkdir()
+    (proc / "cpuinfo").write_text("")
+    backend = ProcfsBackend(str(proc))
+
+    assert sorted(backend.pids()) == [1, 22, 333]
+    assert backend.info(1) == ProcessInfo(
+        1, "/usr/bin/java", ("java", "-jar", "/games/MultiMC/instances/a/x.jar")
+    )
+    # Processes of other users have no readable exe.
+    assert backend.info(22) == ProcessInfo(22, None, ())
+    assert backend.info(333) is None
+    assert backend.info(4444) is None
+
+
+def test_scanner_defers_lookups_over_limit():
+    backend = CountingBackend({pid: ProcessInfo(pid, f"/bin/{pid}", ()) for pid in range(10)})
+    scanner = ProcessScanner(backend, max_lookups=4)
+    assert len(scanner.scan()) == 4
+    assert len(scanner.scan()) == 8
+    assert len(scanner.scan()) == 10
+    assert sorted(backend.lookups) == list(range(10))
+
+
+def test_scanner_forgets_exited_processes():
+    backend = CountingBackend({1: ProcessInfo(1, "/bin/a", ()), 2: None})
+    scanner = ProcessScanner(backend)
+    assert scanner.scan() == [ProcessInfo(1, "/bin/a", ())]
+    backend.processes[1] = ProcessInfo(1, "/bin/b", ())
+    scanner.scan()
+    # The PID is alive in every scan, so it is not looked up again.
+    assert backend.lookups.count(1) == 1
+    del backend.processes[1]
+    assert scanner.scan() == []
+    backend.processes[1] = ProcessInfo(1, "/bin/b", ())
+    assert scanner.scan() == [ProcessInfo(1, "/bin/b", ())]
+
+
+def test_find_with_path_matcher():
+    root = os.path.join(os.sep, "games", "MultiMC")
+    backend = CountingBackend(
+        {
+            1: ProcessInfo(1, os.path.join(root, "MultiMC"), ()),
+            2: ProcessInfo(2, "/usr/bin/java", ("java", os.path.join(root, "instances", "a"))),
+            3: ProcessInfo(3, os.path.join(os.sep, "games", "MultiMC2", "MultiMC"), ()),
+            4: ProcessInfo(4, None, ()),
+        }
+    )
+    found = ProcessScanner(backend).find(
+        {"multimc": path_matcher([root, None]), "other": path_matcher(["/elsewhere"])}
+    )
+    assert list(found) == ["multimc"]
+    assert sorted(found["multimc"]) == [1, 2]
+
+
+def test_path_matcher_respects_path_boundaries():
+    root = os.path.join(os.sep, "games", "MultiMC")
+    match = path_matcher([root])
+
+    def command_line(*args):
+        return match(ProcessInfo(1, "/usr/bin/java", args))
+
+    assert command_line(os.path.join(root, "instances", "a", "minecraft.jar"))
+    assert command_line("-Djava.library.path=" + os.path.join(root, "natives"))
+    assert command_line("-cp", os.pathsep.join(["/lib/a.jar", os.path.join(root, "b.jar")]))
+    assert command_line(root)
+    assert not command_line(os.path.join(os.sep, "games", "MultiMC-old", "instances"))
+    assert not command_line(os.path.join(os.sep, "games", "MultiMC.bak"))
+    assert not command_line(os.path.join(os.sep, "backup") + root)
+    assert not match(ProcessInfo(1, root + "-old" + os.sep + "MultiMC", ()))
@@ -0,0 +1,53 @@
+from benchmarks.fixtures import FakeWinreg, make_uninstall_hive
+from consts import SOFTWARE_PATHS, WIN_UNINSTALL_RELATIVE_LOCATION
+import registry
+
+PATHS = [software_path + WIN_UNINSTALL_RELATIVE_LOCATION for software_path in SOFTWARE_PATHS]
+
+
+def _index(fake) -> registry.UninstallIndex:
+    backend = registry.RegistryBackend(
+        fake, hives=[FakeWinreg.HKEY_CURRENT_USER, FakeWinreg.HKEY_LOCAL_MACHINE]
+    )
+    return registry.UninstallIndex(backend, PATHS)
+
+
+def test_find():
+    entry = _index(make_uninstall_hive(20)).find("Minecraft Launcher")
+    assert entry.publisher == "Mojang"
+    assert entry.uninstall_string == "MsiExec.exe /X{MINECRAFT}"
+    assert entry.install_location is None
+    assert entry.source == (FakeWinreg.HKEY_LOCAL_MACHINE, PATHS[1] + "\\{MINECRAFT}")
+
+
+def test_find_by_publisher():
+    index = _index(make_uninstall_hive(20))
+    assert index.find("Program 3", "Vendor").display_name == "Program 3"
+    assert index.find("Program 3", "Mojang") is None
+    assert index.find("Missing program") is None
+
+
+def test_unchanged_keys_are_not_enumerated_again():
+    fake = make_uninstall_hive(50)
+    index = _index(fake)
+    index.find("Minecraft Launcher")
+    calls = fake.calls
+    index.find("Minecraft Launcher")
+    # Only the last write time of each Uninstall key is checked.
+    assert fake.calls - calls == 2 * len(PATHS) * len(fake.hives)
+
+
+def test_added_program_is_found():
+    fake = make_uninstall_hive(20)
+    index = _index(fake)
+    assert index.find("New program") is None
+    fake.create_key(
+        FakeWinreg.HKEY_CURRENT_USER, PATHS[0] + "\\{NEW}", {"DisplayName": "New program"}
+    )
+    assert index.find("New program").source == (FakeWinreg.HKEY_CURRENT_USER, PATHS[0] + "\\{NEW}")
+
+
+def test_missing_uninstall_key():
+    fake = FakeWinreg()
+    fake.create_key(FakeWinreg.HKEY_CURRENT_USER, PATHS[0] + "\\{ONLY}", {"DisplayName": "Only"})
+    assert _index(fake).find("Only") is not None
@@ -0,0 +1,64 @@
+import os, pickle
+
+import pytest
+
+from benchmarks.fixtures import make_plugin
+from consts import GameID
+from utils import time_cache
+from utils.time_journal import TimeJournal
+
+CACHE = {GameID.Minecraft: {"time_played": 90, "last_played": 1600000000}}
+UNREADABLE = {
+    "newer_version": time_cache.FILE_HEADER + '{"version":2,"games":{}}',
+    "truncated_json": time_cache.FILE_HEADER + '{"version":1,"games":{"1":[',
+    "truncated_legacy": time_cache.FILE_HEADER + pickle.dumps(CACHE).hex()[:-20],
+    "garbage": "\x00\x01 not a cache",
+}
+
+
+def test_write_and_read_file(tmp_path):
+    path = str(tmp_path / "cache.txt")
+    time_cache.write_file(path, CACHE, journal=3)
+    assert time_cache.read_snapshot(path) == (CACHE, 3)
+    assert time_cache.read_file(path) == CACHE
+
+
+def test_reads_legacy_file(tmp_path):
+    path = tmp_path / "cache.txt"
+    path.write_text(time_cache.FILE_HEADER + pickle.dumps(CACHE).hex())
+    assert time_cache.read_snapshot(str(path)) == (CACHE, None)
+
+
+@pytest.mark.parametrize("data", UNREADABLE.values(), ids=list(UNREADABLE))
+def test_unreadable_file_is_ignored(tmp_path, data):
+    path = tmp_path / "cache.txt"
+    path.write_text(data)
+    assert time_cache.read_snapshot(str(path)) == (None, None)
+    assert TimeJournal(str(path), str(tmp_path / "journal.txt")).load() is None
+
+
+def test_persistent_cache():
+    persistent_cache = {}
+    assert time_cache.update_persistent_cache(persistent_cache, CACHE)
+    assert not time_cache.update_persistent_cache(persistent_cache, CACHE)
+    assert time_cache.load_persistent_cache(persistent_cache) == CACHE
+    legacy = {time_cache.LEGACY_PERSISTENT_CACHE_KEY: pickle.dumps(CACHE).hex()}
+    assert time_cache.load_persistent_cache(legacy) == CACHE
+
+
+def test_unreadable_persistent_cache_is_ignored():
+    legacy = {time_cache.LEGACY_PERSISTENT_CACHE_KEY: pickle.dumps(CACHE).hex()[:-20]}
+    assert time_cache.load_persistent_cache(legacy) is None
+    record = {time_cache.PERSISTENT_CACHE_PREFIX + GameID.Minecraft: "[90,"}
+    assert time_cache.load_persistent_cache(record) is None
+
+
+@pytest.mark.parametrize("data", UNREADABLE.values(), ids=list(UNREADABLE))
+def test_plugin_starts_with_unreadable_cache_file(tmp_path, data):
+    installed = tmp_path / "installed"
+    installed.mkdir()
+    (installed / "minecraft_play_time_cache.txt").write_text(data)
+    instance = make_plugin(str(installed))
+    assert instance.game_time_cache is None
+    assert os.path.exists(instance.play_time_cache_path)
+    instance.time_journal.close()
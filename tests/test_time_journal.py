@@ -0,0 +1,96 @@
+import json
+
+from utils import time_cache
+from utils.time_journal import CHECKPOINT, START, STOP, TimeJournal, replay
+
+
+def _journal(tmp_path) -> TimeJournal:
+    return TimeJournal(str(tmp_path / "gametime_cache"), str(tmp_path / "gametime_journal"))
+
+
+def test_replay_adds_stopped_sessions():
+    cache = replay({}, [[START, "game", 0], [CHECKPOINT, "game", 60], [STOP, "game", 120]])
+    assert cache == {"game": {"time_played": 2, "last_played": 120}}
+
+
+def test_replay_counts_unterminated_session_up_to_last_checkpoint():
+    cache = {"game": {"time_played": 10, "last_played": 0}}
+    replay(cache, [[START, "game", 0], [CHECKPOINT, "game", 60], [CHECKPOINT, "game", 180]])
+    assert cache == {"game": {"time_played": 13, "last_played": 180}}
+
+
+def test_replay_closes_session_restarted_without_stop():
+    cache = replay({}, [[START, "game", 0], [CHECKPOINT, "game", 60], [START, "game", 600]])
+    assert cache["game"]["time_played"] == 1
+    assert cache["game"]["last_played"] == 600
+
+
+def test_load_without_files(tmp_path):
+    assert _journal(tmp_path).load() is None
+
+
+def test_load_replays_journal_after_crash(tmp_path):
+    journal = _journal(tmp_path)
+    journal.load()
+    journal.start("game", 0)
+    journal.checkpoint(["game"], 60)
+    journal.checkpoint(["game"], 120)
+    # Crash: the journal is never stopped nor closed.
+    assert _journal(tmp_path).load() == {"game": {"time_played": 2, "last_played": 120}}
+
+
+def test_load_ignores_torn_last_line(tmp_path):
+    journal = _journal(tmp_path)
+    journal.load()
+    journal.start("game", 0)
+    journal.checkpoint(["game"], 60)
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('["checkpoint", "ga')
+    assert _journal(tmp_path).load() == {"game": {"time_played": 1, "last_played": 60}}
+
+
+def test_compact_mid_session(tmp_path):
+    journal = _journal(tmp_path)
+    journal.load()
+    journal.start("game", 0)
+    journal.checkpoint(["game"], 120)
+    cache = replay({}, [[START, "game", 0], [CHECKPOINT, "game", 120]])
+    journal.compact(cache, {"game": 120})
+    assert journal.generation == 1
+    assert time_cache.read_snapshot(journal.snapshot_path) == (cache, 1)
+
+    journal.checkpoint(["game"], 180)
+    journal.stop("game", 240)
+    journal.close()
+    # The time before compaction is in the snapshot, the journal only adds the rest.
+    assert _journal(tmp_path).load() == {"game": {"time_played": 4, "last_played": 240}}
+
+
+def test_stale_journal_is_skipped(tmp_path):
+    journal = _journal(tmp_path)
+    journal.load()
+    journal.start("game", 0)
+    journal.stop("game", 120)
+    journal.close()
+    # Crash during compaction, after the snapshot was written but before the journal was: the
+    # snapshot already includes the old journal's session.
+    cache = replay({}, [[START, "game", 0], [STOP, "game", 120]])
+    time_cache.write_file(journal.snapshot_path, cache, journal=1)
+
+    reloaded = _journal(tmp_path)
+    assert reloaded.load() == {"game": {"time_played": 2, "last_played": 120}}
+    assert reloaded.generation == 1
+
+
+def test_new_journal_after_stale_one_is_replayed(tmp_path):
+    journal = _journal(tmp_path)
+    cache = {"game": {"time_played": 2, "last_played": 120}}
+    time_cache.write_file(journal.snapshot_path, cache, journal=3)
+    journal.load()
+    journal.start("game", 600)
+    journal.stop("game", 660)
+    journal.close()
+    with open(journal.path) as f:
+        assert json.loads(f.readline()) == {"generation": 3}
+    assert _journal(tmp_path).load() == {"game": {"time_played": 3, "last_played": 660}}
@@ -0,0 +1,65 @@
+import asyncio
+
+from utils.watcher import PollingWatcher
+
+
+def _watch(results, on_change, **kwargs):
+    """Runs a watcher over the probe `results` (exceptions are raised) until they run out."""
+
+    async def run():
+        done = asyncio.Event()
+        values = iter(results)
+
+        async def probe():
+            try:
+                value = next(values)
+            except StopIteration:
+                done.set()
+                await asyncio.sleep(1)
+                return None
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        watcher = PollingWatcher(probe, on_change, 0.001, **kwargs)
+        watcher.start()
+        await asyncio.wait_for(done.wait(), 5)
+        running = watcher.running
+        watcher.stop()
+        return watcher, running
+
+    return asyncio.run(run())
+
+
+def test_calls_on_change_with_changes():
+    changes = []
+    _, running = _watch([1, 1, 2, 2, 3], changes.append)
+    assert changes == [2, 3]
+    assert running
+
+
+def test_failed_probe_is_not_a_change():
+    changes = []
+    _, running = _watch(
+        [frozenset(), asyncio.TimeoutError(), frozenset(), OSError(), frozenset({"multimc"})],
+        changes.append,
+    )
+    assert changes == [frozenset({"multimc"})]
+    assert running
+
+
+def test_failed_probe_backs_off():
+    watcher, _ = _watch([1, OSError(), OSError()], lambda value: None, max_interval=0.01)
+    assert watcher.delay == 0.004
+
+
+def test_on_change_errors_dont_stop_the_watcher():
+    changes = []
+
+    def on_change(value):
+        changes.append(value)
+        raise TypeError(value)
+
+    _, running = _watch([1, 2, 3], on_change)
+    assert changes == [2, 3]
+    assert running